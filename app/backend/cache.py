@@ -0,0 +1,264 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Iterable
+
+from app.config import cache_settings
+from app.utils.cache import SingleFlight, TTLCache
+
+logger = logging.getLogger(__name__)
+
+InvalidationCallback = Callable[[list[str]], None]
+
+
+class CacheBackend(ABC):
+    """Хранилище байтов с TTL и тегами плюс широковещательная рассылка инвалидаций."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()): ...
+
+    @abstractmethod
+    async def delete(self, key: str): ...
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: list[str]):
+        """Удаляет все ключи, записанные с любым из тегов."""
+
+    @abstractmethod
+    async def publish(self, tags: list[str]):
+        """Рассылает сброшенные теги всем воркерам, включая текущий."""
+
+    @abstractmethod
+    async def subscribe(self, callback: InvalidationCallback): ...
+
+    async def close(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Кэш в памяти процесса: для одного воркера, разработки и тестов."""
+
+    def __init__(self, maxsize: int):
+        self._data = TTLCache(maxsize=maxsize, ttl=0, on_evict=self._untag)
+        # обе карты содержат только ключи, которые ещё лежат в _data
+        self._tags: dict[str, set[str]] = {}
+        self._key_tags: dict[str, tuple[str, ...]] = {}
+        self._subscribers: list[InvalidationCallback] = []
+
+    def _untag(self, key: str):
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def get(self, key: str) -> bytes | None:
+        return self._data.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()):
+        self._untag(key)
+        self._data.set(key, value, ttl=ttl)
+        tags = tuple(tags)
+        if tags:
+            self._key_tags[key] = tags
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+    async def delete(self, key: str):
+        self._data.delete(key)
+        self._untag(key)
+
+    async def invalidate_tags(self, tags: list[str]):
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                self._data.delete(key)
+                self._untag(key)
+
+    async def publish(self, tags: list[str]):
+        for callback in self._subscribers:
+            callback(tags)
+
+    async def subscribe(self, callback: InvalidationCallback):
+        self._subscribers.append(callback)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Общий кэш на Redis (нужен Redis >= 7 и пакет redis)."""
+
+    def __init__(self, url: str, channel: str):
+        # импорт здесь, чтобы redis был нужен только там, где он настроен
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(url)
+        self._channel = channel
+        self._listener: asyncio.Task | None = None
+
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"{tag}:keys"
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()):
+        ttl_ms = max(int(ttl * 1000), 1)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(key, value, px=ttl_ms)
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, key)
+                # множество тега живёт не меньше самого долгого своего ключа
+                pipe.pexpire(tag_key, ttl_ms, nx=True)
+                pipe.pexpire(tag_key, ttl_ms, gt=True)
+            await pipe.execute()
+
+    async def delete(self, key: str):
+        await self._redis.delete(key)
+
+    async def invalidate_tags(self, tags: list[str]):
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = await self._redis.smembers(tag_key)
+            await self._redis.delete(tag_key, *keys)
+
+    async def publish(self, tags: list[str]):
+        await self._redis.publish(self._channel, json.dumps(tags))
+
+    async def _subscribed(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(self._channel)
+        return pubsub
+
+    async def _listen(self, pubsub, callback: InvalidationCallback):
+        """Слушает канал и переподключается с экспоненциальной паузой, если Redis недоступен.
+
+        Пока подписки нет, инвалидации других воркеров теряются: локальные
+        кэши процесса догонят их только по своему TTL.
+        """
+        delay = cache_settings.CACHE_RECONNECT_MIN_SECONDS
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = await self._subscribed()
+                    logger.info("Cache invalidation listener reconnected")
+                    delay = cache_settings.CACHE_RECONNECT_MIN_SECONDS
+                async with pubsub:
+                    async for message in pubsub.listen():
+                        callback(json.loads(message["data"]))
+                logger.warning("Cache invalidation subscription closed, reconnecting in %.1f s", delay)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Cache invalidation listener failed, reconnecting in %.1f s", delay)
+            pubsub = None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, cache_settings.CACHE_RECONNECT_MAX_SECONDS)
+
+    async def subscribe(self, callback: InvalidationCallback):
+        # первая подписка - до возврата, чтобы после start() не терять инвалидации
+        pubsub = await self._subscribed()
+        self._listener = asyncio.create_task(self._listen(pubsub, callback))
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        await self._redis.aclose()
+
+
+class Cache:
+    """Cache-aside поверх бэкенда: JSON-значения или готовые байты, TTL, теги и single-flight загрузка."""
+
+    def __init__(self, backend: CacheBackend, prefix: str):
+        self.backend = backend
+        self.prefix = prefix
+        self._flights = SingleFlight()
+        self._invalidation_callbacks: list[InvalidationCallback] = []
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, *parts) -> str:
+        return ":".join((self.prefix, *map(str, parts)))
+
+    async def get(self, key: str):
+        raw = await self.backend.get(key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value, ttl: float, tags: Iterable[str] = ()):
+        await self.set_bytes(key, json.dumps(value).encode("utf-8"), ttl, tags)
+
+    async def get_bytes(self, key: str) -> bytes | None:
+        return await self.backend.get(key)
+
+    async def set_bytes(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()):
+        await self.backend.set(key, value, ttl, [self.key("tag", tag) for tag in tags])
+
+    async def delete(self, key: str):
+        await self.backend.delete(key)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        tags: Iterable[str] = (),
+        raw: bool = False,
+    ):
+        """Значение из кэша или из loader; None не кэшируется.
+
+        raw - loader отдаёт bytes, они хранятся и возвращаются как есть, без JSON.
+        """
+        get, store = (self.get_bytes, self.set_bytes) if raw else (self.get, self.set)
+        value = await get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        async def load_and_store():
+            value = await loader()
+            if value is not None:
+                await store(key, value, ttl, tags)
+            return value
+
+        return await self._flights.run(key, load_and_store)
+
+    async def invalidate_tags(self, *tags: str):
+        await self.backend.invalidate_tags([self.key("tag", tag) for tag in tags])
+        await self.backend.publish(list(tags))
+
+    def on_invalidate(self, callback: InvalidationCallback):
+        """Колбэк для локальных кэшей процесса: вызывается с тегами, сброшенными любым воркером."""
+        self._invalidation_callbacks.append(callback)
+
+    def _dispatch(self, tags: list[str]):
+        for callback in self._invalidation_callbacks:
+            try:
+                callback(tags)
+            except Exception:
+                logger.exception("Cache invalidation callback failed")
+
+    async def start(self):
+        await self.backend.subscribe(self._dispatch)
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def create_cache() -> Cache:
+    if cache_settings.CACHE_URL:
+        backend = RedisCacheBackend(cache_settings.CACHE_URL, cache_settings.CACHE_INVALIDATION_CHANNEL)
+    else:
+        backend = MemoryCacheBackend(maxsize=cache_settings.CACHE_MEMORY_MAX_SIZE)
+    return Cache(backend, prefix=cache_settings.CACHE_PREFIX)
+
+
+cache = create_cache()
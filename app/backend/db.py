@@ -1,12 +1,76 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession, create_async_engine
-from sqlalchemy.orm import DeclarativeBase, declared_attr
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, AsyncSession, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session, declared_attr
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.sql.dml import UpdateBase
 from app.config import DB_URL, database_settings
 
+logger = logging.getLogger(__name__)
 
-engine = create_async_engine(
-    DB_URL,
-    echo=True,
-)
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, который считает, сколько запросы ждали свободное соединение.
+
+    Ожидание - только время в очереди пула; установка нового соединения
+    считается отдельно, в connect_seconds.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_wait_seconds = 0.0
+        self.max_checkout_wait_seconds = 0.0
+        self.connects = 0
+        self.connect_seconds = 0.0
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            self.connects += 1
+            self.connect_seconds += time.perf_counter() - started
+
+    def _do_get(self):
+        started = time.perf_counter()
+        connecting_before = self.connect_seconds
+        try:
+            return super()._do_get()
+        finally:
+            # _do_get сам открывает соединение, если пул ещё не заполнен
+            waited = time.perf_counter() - started - (self.connect_seconds - connecting_before)
+            self.checkouts += 1
+            self.checkout_wait_seconds += waited
+            self.max_checkout_wait_seconds = max(self.max_checkout_wait_seconds, waited)
+
+
+def make_engine(url: str) -> AsyncEngine:
+    # sqlite (локальные заглушки реплик) не понимает настроек пула и asyncpg
+    if url.startswith("sqlite"):
+        return create_async_engine(url, echo=database_settings.echo)
+    return create_async_engine(
+        url,
+        echo=database_settings.echo,
+        poolclass=TimedQueuePool,
+        pool_size=database_settings.DB_POOL_SIZE,
+        max_overflow=database_settings.DB_MAX_OVERFLOW,
+        pool_timeout=database_settings.DB_POOL_TIMEOUT,
+        pool_recycle=database_settings.DB_POOL_RECYCLE,
+        pool_pre_ping=database_settings.DB_POOL_PRE_PING,
+        connect_args={
+            "timeout": database_settings.DB_CONNECT_TIMEOUT,
+            "statement_cache_size": database_settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": database_settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+engine = make_engine(DB_URL)
 
 session_maker = async_sessionmaker(
     bind=engine,
@@ -14,12 +78,114 @@ session_maker = async_sessionmaker(
     class_=AsyncSession
 )
 
+
+class ReplicaSet:
+    """Реплики для чтения по кругу; недоступная реплика пропускается DB_REPLICA_RETRY_SECONDS."""
+
+    def __init__(self, engines: list[AsyncEngine], retry_seconds: float):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._down_until: dict[Engine, float] = {}
+        self._next = 0
+        for replica in engines:
+            event.listen(replica.sync_engine, "handle_error", self._on_error)
+
+    def candidates(self):
+        """Живые реплики, начиная со следующей по кругу."""
+        start = self._next
+        self._next += 1
+        for i in range(len(self.engines)):
+            replica = self.engines[(start + i) % len(self.engines)].sync_engine
+            if self.is_up(replica):
+                yield replica
+
+    def is_up(self, replica: Engine) -> bool:
+        return self._down_until.get(replica, 0) <= time.monotonic()
+
+    def mark_down(self, replica: Engine):
+        logger.warning("Read replica %s is unavailable, using primary", replica.url)
+        self._down_until[replica] = time.monotonic() + self.retry_seconds
+
+    def _on_error(self, context):
+        # нет соединения - не удалось подключиться; is_disconnect - соединение оборвалось
+        if context.connection is None or context.is_disconnect:
+            self.mark_down(context.engine)
+
+
+replicas = ReplicaSet(
+    [make_engine(url) for url in database_settings.replica_urls],
+    retry_seconds=database_settings.DB_REPLICA_RETRY_SECONDS,
+)
+
+
+class RoutingSession(Session):
+    """Читает с реплики, пока в сессии не было записи; после первой записи - только primary."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            self.info.get("primary")
+            or self._flushing
+            or isinstance(clause, UpdateBase)
+            or getattr(clause, "_for_update_arg", None) is not None
+        ):
+            self.info["primary"] = True
+            return engine.sync_engine
+        # одна реплика на всю сессию, чтобы не смешивать снимки разных серверов
+        replica = self.info.get("replica")
+        if replica is not None:
+            return replica
+        for replica in replicas.candidates():
+            try:
+                # соединение берём сразу, чтобы недоступная реплика не роняла запрос
+                self.connection(bind_arguments={"bind": replica})
+            except (DBAPIError, OSError, TimeoutError):
+                replicas.mark_down(replica)
+                continue
+            self.info["replica"] = replica
+            return replica
+        self.info["primary"] = True
+        return engine.sync_engine
+
+
+read_session_maker = async_sessionmaker(
+    expire_on_commit=False,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+)
+
+
+def _pool_gauges(pool) -> dict:
+    if not isinstance(pool, QueuePool):
+        return {}
+    gauges = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    if isinstance(pool, TimedQueuePool):
+        gauges.update(
+            checkouts=pool.checkouts,
+            checkout_wait_seconds_total=pool.checkout_wait_seconds,
+            checkout_wait_seconds_max=pool.max_checkout_wait_seconds,
+            connects=pool.connects,
+            connect_seconds_total=pool.connect_seconds,
+        )
+    return gauges
+
+
+def pool_stats() -> dict:
+    stats = _pool_gauges(engine.sync_engine.pool)
+    if replicas.engines:
+        stats["replicas"] = {
+            replica.url.render_as_string(hide_password=True): _pool_gauges(replica.sync_engine.pool)
+            for replica in replicas.engines
+        }
+    return stats
+
 class Base(DeclarativeBase):
     __abstract__ = True
 
     @declared_attr.directive
     def __tablename__(cls) -> str:
         return f'{cls.__name__.lower()}s'
-
-
-
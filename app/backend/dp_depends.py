@@ -1,8 +1,25 @@
-from app.backend.db import session_maker
+from typing import Annotated
 
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import read_session_maker, replicas, session_maker
+
+# AsyncSession берёт соединение из пула только на первом запросе к БД и отдаёт его
+# после commit/rollback или закрытия. Подключайте через Depends(..., scope="function"),
+# тогда сессия закрывается сразу после обработчика, а не после отправки ответа.
+# FastAPI кэширует зависимость в пределах запроса, поэтому обработчик и get_current_user
+# с одинаковым Depends(get_db, scope="function") получают одну и ту же сессию.
 async def get_db():
     async with session_maker() as session:
         yield session
 
 
-
+async def get_read_db(primary: Annotated[AsyncSession, Depends(get_db, scope="function")]):
+    """Сессия для чтения: запросы идут на реплику, после первой записи - на primary."""
+    if not replicas.engines:
+        # без реплик читать всё равно с primary: одна сессия на запрос вместе с авторизацией
+        yield primary
+        return
+    async with read_session_maker() as session:
+        yield session
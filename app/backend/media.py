@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator
+
+from app.config import media_settings
+
+logger = logging.getLogger(__name__)
+
+
+class MediaTooLarge(Exception):
+    pass
+
+
+class MediaStorage:
+    """Файлы на диске по sha256 содержимого: root/ab/cd/abcd..., миниатюры в root/thumbnails.
+
+    Загрузка пишется во временный файл рядом с хранилищем (stage) и
+    переносится на место атомарным rename (commit); если такой файл уже
+    есть, копия удаляется.
+    """
+
+    def __init__(self, root: Path, max_size: int, write_chunk: int):
+        self.root = root
+        self.max_size = max_size
+        self.write_chunk = write_chunk
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def thumbnail_path(self, digest: str) -> Path:
+        return self.root / "thumbnails" / digest[:2] / f"{digest}.jpg"
+
+    @staticmethod
+    def _write(file, digest, data: bytes):
+        # hashlib и запись отпускают GIL, поэтому в потоке цикл событий не ждёт
+        digest.update(data)
+        file.write(data)
+
+    async def stage(self, chunks: AsyncIterator[bytes]) -> tuple[str, int, Path]:
+        """Пишет поток байтов во временный файл; возвращает sha256, размер и путь к файлу."""
+        tmp_dir = self.root / "tmp"
+        await asyncio.to_thread(tmp_dir.mkdir, parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=tmp_dir)
+        tmp_path = Path(tmp_name)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as file:
+                buffer = bytearray()
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_size:
+                        raise MediaTooLarge
+                    buffer += chunk
+                    if len(buffer) >= self.write_chunk:
+                        await asyncio.to_thread(self._write, file, digest, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(self._write, file, digest, bytes(buffer))
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return digest.hexdigest(), size, tmp_path
+
+    async def commit(self, tmp_path: Path, digest: str) -> bool:
+        """Переносит временный файл на место; True, если такого файла ещё не было."""
+        return await asyncio.to_thread(self._commit, tmp_path, self.path(digest))
+
+    async def discard(self, tmp_path: Path):
+        await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+
+    async def delete(self, digest: str):
+        await asyncio.to_thread(self.path(digest).unlink, missing_ok=True)
+
+    def has_thumbnail(self, digest: str) -> bool:
+        return self.thumbnail_path(digest).is_file()
+
+    @staticmethod
+    def _commit(tmp_path: Path, target: Path) -> bool:
+        if target.exists():
+            tmp_path.unlink()
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+        return True
+
+
+def make_thumbnail(source: str, target: str, size: int):
+    """Выполняется в отдельном процессе: декодирование картинок нагружает CPU и держит GIL."""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_target = f"{target}.{os.getpid()}.tmp"
+        image.save(tmp_target, "JPEG", quality=85)
+    os.replace(tmp_target, target)
+
+
+class Thumbnailer:
+    """Делает миниатюры картинок в фоне, в пуле процессов; запрос загрузки их не ждёт."""
+
+    def __init__(self, storage: MediaStorage, workers: int, size: int):
+        self.storage = storage
+        self.workers = workers
+        self.size = size
+        self.enabled = importlib.util.find_spec("PIL") is not None
+        self._executor: ProcessPoolExecutor | None = None
+        self._tasks: set[asyncio.Task] = set()
+        # digest миниатюр, которые уже делаются: повторная загрузка их не дублирует
+        self._pending: set[str] = set()
+        self.generated = 0
+        self.failed = 0
+
+    def submit(self, digest: str):
+        if not self.enabled or digest in self._pending:
+            return
+        self._pending.add(digest)
+        task = asyncio.create_task(self._generate(digest))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._pending.discard(digest))
+
+    async def _generate(self, digest: str):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                self._executor,
+                make_thumbnail,
+                str(self.storage.path(digest)),
+                str(self.storage.thumbnail_path(digest)),
+                self.size,
+            )
+        except Exception:
+            self.failed += 1
+            logger.exception("Thumbnail for %s failed", digest)
+        else:
+            self.generated += 1
+
+    async def close(self):
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {"pending": len(self._tasks), "generated": self.generated, "failed": self.failed}
+
+
+media_storage = MediaStorage(
+    media_settings.MEDIA_ROOT,
+    max_size=media_settings.MEDIA_MAX_UPLOAD_BYTES,
+    write_chunk=media_settings.MEDIA_WRITE_CHUNK_BYTES,
+)
+thumbnailer = Thumbnailer(
+    media_storage,
+    workers=media_settings.THUMBNAIL_WORKERS,
+    size=media_settings.THUMBNAIL_SIZE,
+)
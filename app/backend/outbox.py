@@ -0,0 +1,242 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import session_maker
+from app.config import outbox_settings
+from app.models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxSink(ABC):
+    """Получатель событий. Доставка "хотя бы раз": при повторе события могут прийти снова."""
+
+    @abstractmethod
+    async def send(self, events: list[dict]): ...
+
+    async def close(self):
+        pass
+
+
+class WebhookSink(OutboxSink):
+    """POST пачки событий JSON-массивом; любой ответ кроме 2xx - повтор (нужен пакет httpx)."""
+
+    def __init__(self, url: str, timeout: float):
+        import httpx
+
+        self._url = url
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def send(self, events: list[dict]):
+        response = await self._client.post(self._url, json=events)
+        response.raise_for_status()
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class LogSink(OutboxSink):
+    """Пишет события в logging, по записи на событие."""
+
+    def __init__(self):
+        self._logger = logging.getLogger(f"{__name__}.events")
+
+    async def send(self, events: list[dict]):
+        for item in events:
+            self._logger.info("%s", json.dumps(item, ensure_ascii=False))
+
+
+class FileSink(OutboxSink):
+    """Дописывает события в файл, по строке JSON на событие."""
+
+    def __init__(self, path: Path):
+        self._path = path
+
+    def _write(self, lines: str):
+        with open(self._path, "a", encoding="utf-8") as file:
+            file.write(lines)
+
+    async def send(self, events: list[dict]):
+        lines = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in events)
+        await asyncio.to_thread(self._write, lines)
+
+
+class MemorySink(OutboxSink):
+    """Очередь в памяти процесса - для тестов."""
+
+    def __init__(self):
+        self.queue: asyncio.Queue[dict] = asyncio.Queue()
+
+    async def send(self, events: list[dict]):
+        for item in events:
+            self.queue.put_nowait(item)
+
+
+def _message(row: OutboxEvent) -> dict:
+    return {
+        "id": row.id,
+        "type": row.event_type,
+        "payload": row.payload,
+        "created_at": row.created_at.isoformat(),
+    }
+
+
+class OutboxDispatcher:
+    """Фоновая задача: забирает события пачками и отправляет во все получатели.
+
+    Пачка захватывается короткой транзакцией: FOR UPDATE SKIP LOCKED и
+    сдвиг available_at на OUTBOX_LEASE_SECONDS, поэтому несколько воркеров
+    разбирают outbox параллельно, а во время отправки строки не заблокированы
+    и соединение с базой не занято. Отправленные события удаляются,
+    неотправленные откладываются с экспоненциальной задержкой.
+    """
+
+    def __init__(self, sinks: list[OutboxSink], batch_size: int, poll_interval: float, lease_seconds: float):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.delivered = 0
+        self.failed_batches = 0
+
+    def wake(self):
+        self._wakeup.set()
+
+    async def _claim(self) -> list[dict]:
+        async with session_maker() as session:
+            rows = (await session.scalars(
+                select(OutboxEvent)
+                .where(OutboxEvent.available_at <= func.now())
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                return []
+            messages = [_message(row) for row in rows]
+            await session.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_([row.id for row in rows]))
+                .values(available_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, self.lease_seconds))
+            )
+            await session.commit()
+        return messages
+
+    async def drain_once(self) -> int:
+        """Отправляет одну пачку, возвращает число доставленных событий."""
+        messages = await self._claim()
+        if not messages:
+            return 0
+        ids = [message["id"] for message in messages]
+        try:
+            for sink in self.sinks:
+                await sink.send(messages)
+        except Exception as exc:
+            logger.warning("Outbox delivery of %d events failed: %r", len(ids), exc)
+            self.failed_batches += 1
+            delay = func.least(
+                outbox_settings.OUTBOX_RETRY_BASE_SECONDS * func.power(2, OutboxEvent.attempts),
+                outbox_settings.OUTBOX_RETRY_MAX_SECONDS,
+            )
+            async with session_maker() as session:
+                await session.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(ids))
+                    .values(
+                        attempts=OutboxEvent.attempts + 1,
+                        available_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, delay),
+                        last_error=repr(exc)[:500],
+                    )
+                )
+                await session.commit()
+            return 0
+        async with session_maker() as session:
+            await session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(ids)))
+            await session.commit()
+        self.delivered += len(ids)
+        return len(ids)
+
+    async def _run(self):
+        while True:
+            try:
+                delivered = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Outbox dispatcher failed")
+                delivered = 0
+            if delivered == self.batch_size:
+                # outbox ещё не пуст - сразу следующая пачка
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for sink in self.sinks:
+            await sink.close()
+
+    def stats(self) -> dict:
+        return {"delivered": self.delivered, "failed_batches": self.failed_batches}
+
+
+def create_sinks() -> list[OutboxSink]:
+    sinks = []
+    for name in filter(None, map(str.strip, outbox_settings.OUTBOX_SINKS.split(","))):
+        if name == "webhook":
+            if not outbox_settings.OUTBOX_WEBHOOK_URL:
+                raise ValueError("OUTBOX_WEBHOOK_URL is required for the webhook sink")
+            sinks.append(WebhookSink(outbox_settings.OUTBOX_WEBHOOK_URL, outbox_settings.OUTBOX_WEBHOOK_TIMEOUT_SECONDS))
+        elif name == "log":
+            sinks.append(LogSink())
+        elif name == "file":
+            if not outbox_settings.OUTBOX_FILE_PATH:
+                raise ValueError("OUTBOX_FILE_PATH is required for the file sink")
+            sinks.append(FileSink(outbox_settings.OUTBOX_FILE_PATH))
+        elif name == "memory":
+            sinks.append(MemorySink())
+        else:
+            raise ValueError(f"Unknown outbox sink: {name}")
+    return sinks
+
+
+outbox_dispatcher = OutboxDispatcher(
+    create_sinks(),
+    batch_size=outbox_settings.OUTBOX_BATCH_SIZE,
+    poll_interval=outbox_settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    lease_seconds=outbox_settings.OUTBOX_LEASE_SECONDS,
+)
+
+
+def add_event(session: AsyncSession, event_type: str, **payload):
+    """Кладёт событие в сессию: оно сохранится вместе с остальными изменениями при commit."""
+    session.add(OutboxEvent(event_type=event_type, payload=payload))
+    # после commit будим диспетчер, чтобы не ждать следующего опроса
+    if not session.info.get("outbox_wakeup"):
+        session.info["outbox_wakeup"] = True
+        event.listen(session.sync_session, "after_commit", _wake_dispatcher)
+
+
+def _wake_dispatcher(session):
+    outbox_dispatcher.wake()
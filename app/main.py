@@ -1,14 +1,48 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.routers.course import router as course 
 from app.routers.steps import router as steps 
 from app.routers.users import router as users
 from app.routers.admin import router as admin
+from app.routers.admin_export import router as admin_export
+from app.routers.admin_import import router as admin_import
+from app.routers.admin_media import router as admin_media
+from app.routers.media import router as media
 from app.routers.auth_header import router as auth
 from app.routers.auth_cookie import router as auth_cookie
+from app.routers.metrics import router as metrics
+from app.backend.cache import cache
+from app.backend.media import thumbnailer
+from app.backend.outbox import outbox_dispatcher
+from app.config import compression_settings, metrics_settings, outbox_settings, sql_profiler_settings, stats_settings
+from app.utils.compression import CompressionMiddleware
+from app.utils.course_stats import stats_reconciler
+from app.utils.jwt_token import revoked_tokens
+from app.utils.metrics import MetricsMiddleware
+from app.utils.sql_profiler import SqlProfilerMiddleware
+from app.utils.pw_utils import password_hasher
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await cache.start()
+    await revoked_tokens.start()
+    if outbox_settings.OUTBOX_ENABLED:
+        outbox_dispatcher.start()
+    if stats_settings.STATS_RECONCILE_INTERVAL_SECONDS > 0:
+        stats_reconciler.start()
+    yield
+    await stats_reconciler.close()
+    await revoked_tokens.close()
+    await thumbnailer.close()
+    await outbox_dispatcher.close()
+    await cache.close()
+    password_hasher.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost",
@@ -25,10 +59,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if compression_settings.COMPRESSION_ENABLED:
+    # внутри метрик и профайлера: они видят уже сжатый ответ и время сжатия
+    app.add_middleware(CompressionMiddleware)
+
+if sql_profiler_settings.SQL_PROFILER_ENABLED:
+    app.add_middleware(SqlProfilerMiddleware)
+
+if metrics_settings.METRICS_ENABLED:
+    # добавлен последним - снаружи профайлера, счётчики запроса у них общие
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics)
 
 app.include_router(course)
 app.include_router(steps)
 app.include_router(admin)
+app.include_router(admin_export)
+app.include_router(admin_import)
+app.include_router(admin_media)
+app.include_router(media)
 users.include_router(auth_cookie)
 app.include_router(users)
 
@@ -0,0 +1,49 @@
+"""step order and progress indexes
+
+Revision ID: 3d9a51c7e2b4
+Revises: 7faa5e26ff4e
+Create Date: 2026-10-18 10:00:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9a51c7e2b4'
+down_revision: Union[str, Sequence[str], None] = '7faa5e26ff4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # если в курсе уже есть шаги с одинаковым order, миграция упадёт -
+    # такие шаги нужно перенумеровать вручную
+    op.create_unique_constraint('uq_steps_course_id_order', 'steps', ['course_id', 'order'])
+    op.create_index(
+        'ix_steps_course_id_order_active',
+        'steps',
+        ['course_id', 'order'],
+        unique=False,
+        postgresql_where=sa.text('is_active'),
+    )
+    op.create_index(
+        op.f('ix_usercourseprogresss_course_id'),
+        'usercourseprogresss',
+        ['course_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_usercourseprogresss_course_id'), table_name='usercourseprogresss')
+    op.drop_index(
+        'ix_steps_course_id_order_active',
+        table_name='steps',
+        postgresql_where=sa.text('is_active'),
+    )
+    op.drop_constraint('uq_steps_course_id_order', 'steps', type_='unique')
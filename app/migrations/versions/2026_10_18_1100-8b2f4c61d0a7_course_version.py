@@ -0,0 +1,28 @@
+"""course version
+
+Revision ID: 8b2f4c61d0a7
+Revises: 3d9a51c7e2b4
+Create Date: 2026-10-18 11:00:41.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2f4c61d0a7'
+down_revision: Union[str, Sequence[str], None] = '3d9a51c7e2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('courses', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('courses', 'version')
@@ -0,0 +1,54 @@
+"""course stats
+
+Revision ID: 5e7a0d92b8c3
+Revises: c41e97a3f5d2
+Create Date: 2026-10-18 13:00:25.648190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e7a0d92b8c3'
+down_revision: Union[str, Sequence[str], None] = 'c41e97a3f5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('coursestats',
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('enrolled', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('completed', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('course_id')
+    )
+    op.create_table('stepstats',
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('step_id', sa.Integer(), nullable=False),
+    sa.Column('users', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['step_id'], ['steps.id'], ),
+    sa.PrimaryKeyConstraint('course_id', 'step_id')
+    )
+    # начальные значения по уже существующему прогрессу
+    op.execute(
+        "INSERT INTO coursestats (course_id, enrolled, completed) "
+        "SELECT course_id, count(*), count(*) FILTER (WHERE is_completed) "
+        "FROM usercourseprogresss GROUP BY course_id"
+    )
+    op.execute(
+        "INSERT INTO stepstats (course_id, step_id, users) "
+        "SELECT course_id, current_step_id, count(*) FROM usercourseprogresss "
+        "WHERE current_step_id IS NOT NULL GROUP BY course_id, current_step_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('stepstats')
+    op.drop_table('coursestats')
@@ -0,0 +1,40 @@
+"""drop steps active order index
+
+Revision ID: e6c1d84a2f90
+Revises: 9f3b6a28c1e5
+Create Date: 2026-10-18 15:00:03.927614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6c1d84a2f90'
+down_revision: Union[str, Sequence[str], None] = '9f3b6a28c1e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # те же ведущие колонки, что у uq_steps_course_id_order, а соседний
+    # активный шаг теперь берётся из закэшированного оглавления
+    op.drop_index(
+        'ix_steps_course_id_order_active',
+        table_name='steps',
+        postgresql_where=sa.text('is_active'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        'ix_steps_course_id_order_active',
+        'steps',
+        ['course_id', 'order'],
+        unique=False,
+        postgresql_where=sa.text('is_active'),
+    )
@@ -0,0 +1,34 @@
+"""revoked tokens
+
+Revision ID: 0c7e5b93a1d4
+Revises: e6c1d84a2f90
+Create Date: 2026-10-18 16:00:08.214590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c7e5b93a1d4'
+down_revision: Union[str, Sequence[str], None] = 'e6c1d84a2f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('revokedtokens',
+    sa.Column('jti', sa.String(length=64), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('jti')
+    )
+    op.create_index('ix_revokedtokens_expires_at', 'revokedtokens', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_revokedtokens_expires_at', table_name='revokedtokens')
+    op.drop_table('revokedtokens')
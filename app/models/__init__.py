@@ -2,3 +2,7 @@ from .courses import Course
 from .steps import Step 
 from .users import User 
 from .user_course import UserCourseProgress
+from .outbox import OutboxEvent
+from .course_stats import CourseStat, StepStat
+from .media import MediaAsset
+from .revoked_token import RevokedToken
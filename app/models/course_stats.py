@@ -0,0 +1,17 @@
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from app.backend.db import Base
+
+
+class CourseStat(Base):
+    """Сколько пользователей начали и закончили курс; ведётся вместе с прогрессом."""
+    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), primary_key=True)
+    enrolled: Mapped[int] = mapped_column(server_default="0")
+    completed: Mapped[int] = mapped_column(server_default="0")
+
+
+class StepStat(Base):
+    """Сколько пользователей сейчас стоят на шаге курса."""
+    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), primary_key=True)
+    step_id: Mapped[int] = mapped_column(ForeignKey("steps.id"), primary_key=True)
+    users: Mapped[int] = mapped_column(server_default="0")
@@ -14,5 +14,7 @@ class Course(Base):
     )
     steps: Mapped[list["Step"]] = relationship(back_populates="course")
     is_active: Mapped[bool] = mapped_column(default=True)
+    # растёт при каждом повторном импорте курса
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
 
 
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.backend.db import Base
+
+
+class RevokedToken(Base):
+    """jti отозванного токена; строка нужна только до истечения срока самого токена."""
+    __table_args__ = (
+        Index("ix_revokedtokens_expires_at", "expires_at"),
+    )
+
+    jti: Mapped[str] = mapped_column(String(64), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
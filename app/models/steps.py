@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import ForeignKey, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.backend.db import Base
 from app.models import *
@@ -6,6 +6,11 @@ from typing import Optional
 
 
 class Step(Base):
+    __table_args__ = (
+        # по нему же читаются оглавление и список шагов курса по порядку
+        UniqueConstraint("course_id", "order", name="uq_steps_course_id_order"),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(32), unique=True)
     text_content: Mapped[str] = mapped_column(nullable=True)
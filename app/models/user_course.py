@@ -8,7 +8,7 @@ from app.models import *
 
 class UserCourseProgress(Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
-    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), primary_key=True)
+    course_id: Mapped[int] = mapped_column(ForeignKey("courses.id"), primary_key=True, index=True)
     current_step_id: Mapped[int] = mapped_column(ForeignKey("steps.id"), nullable=True)
     is_completed: Mapped[bool] = mapped_column(server_default="false")
 
@@ -1,8 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import insert, select
+from sqlalchemy import insert, select, update
+from app.backend.db import pool_stats
 from app.backend.dp_depends import get_db
-from app.schemas import CourseResponse, CreateCourse, CreateStep, StepResponse, UserResponse
+from app.schemas import CourseResponse, CreateCourse, CreateStep, StepResponse, UserListResponse, UserResponse
 from app.utils.admin_check import is_admin 
+from app.utils.current_user import invalidate_user
+from app.utils.course_outline import invalidate_outline
+from app.utils.course_stats import get_course_stats, reconcile_course_stats
+from app.utils.http_cache import invalidate_catalog
+from app.utils import read_models
+from app.utils.pagination import DEFAULT_PAGE_SIZE, afterQuery, limitQuery
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from app.models import Course, User, Step, UserCourseProgress
@@ -11,17 +19,19 @@ from typing import Annotated
 
 router = APIRouter(prefix="/admin", dependencies=[Depends(is_admin)], tags=["admin"])
 
-sessionDep = Annotated[AsyncSession, Depends(get_db)]
+sessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
 
 
 @router.post("/course-create")
 async def create_course(session: sessionDep, course_data: CreateCourse):
-    await session.execute(
+    course_id = await session.scalar(
         insert(Course).values(
             title=course_data.title, description=course_data.description
-        )
+        ).returning(Course.id)
     )
     await session.commit()
+    invalidate_outline(course_id)
+    await invalidate_catalog(course_id)
     return {"status_code": status.HTTP_200_OK, "transaction": "Successful"}
 
 
@@ -32,44 +42,109 @@ async def create_step(
     course_id: int,
     step_data: CreateStep,
 ):
+    new_step = Step(
+        title=step_data.title,
+        order=step_data.order,
+        text_content=step_data.text_content,
+        image_url=step_data.image_url,
+        video_url=step_data.video_url,
+        course_id=course_id,
+        is_end=step_data.is_end,
+    )
+    session.add(new_step)
     try:
-        new_step = Step(
-            title=step_data.title,
-            order=step_data.order,
-            text_content=step_data.text_content,
-            image_url=step_data.image_url,
-            video_url=step_data.video_url,
-            course_id=course_id,
-            is_end=step_data.is_end,
-        )
-        session.add(new_step)
         await session.commit()
-        await session.refresh(new_step)
-        return {"status_code": status.HTTP_200_OK,
-                 "step": StepResponse(
-                    id=new_step.id,
-                    title=new_step.title,
-                    text_content=new_step.text_content,
-                    image_url=new_step.image_url,
-                    video_url=new_step.video_url,
-                    course_id=course_id,
-                    is_end=new_step.is_end
-                 )}
-    except Exception:
+    except IntegrityError:
+        # нарушен внешний ключ на курс или уникальность order/title - разбираем, что именно
+        await session.rollback()
+        if await session.get(Course, course_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No courses found with this course_id",
+            )
+        order_taken = await session.scalar(
+            select(Step.id).where(Step.course_id == course_id, Step.order == step_data.order)
+        )
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No courses found with this course_id",
+            status_code=status.HTTP_409_CONFLICT,
+            detail=(
+                f"Step with order {step_data.order} already exists in this course"
+                if order_taken is not None
+                else "Step title is already used by another step"
+            ),
         )
+    await session.refresh(new_step)
+    invalidate_outline(course_id)
+    await invalidate_catalog(course_id, listing=False)
+    return {"status_code": status.HTTP_200_OK,
+             "step": StepResponse(
+                id=new_step.id,
+                title=new_step.title,
+                text_content=new_step.text_content,
+                image_url=new_step.image_url,
+                video_url=new_step.video_url,
+                course_id=course_id,
+                is_end=new_step.is_end
+             )}
 
 
 @router.get("/all")
-async def get_all_users(session: sessionDep) -> list[UserResponse]:
-    users = await session.scalars(select(User).where(User.is_active == True))
-    users = users.all()
-    response = [UserResponse(id=user.id, first_name=user.first_name, last_name=user.last_name, username=user.username) for user in users]
-    if not response:
+async def get_all_users(
+    session: sessionDep,
+    limit: limitQuery = DEFAULT_PAGE_SIZE,
+    after: afterQuery = None,
+) -> UserListResponse:
+    users, cursor = await read_models.active_users(session, limit, after)
+    response = [user._asdict() for user in users]
+    if not response and not after:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Users not exists"
         )
-    return response
+    return UserListResponse(users=response, next_cursor=cursor)
+
+
+async def _update_user(session: AsyncSession, user_id: int, **values) -> UserResponse:
+    user = await session.scalar(
+        update(User).where(User.id == user_id).values(**values).returning(User)
+    )
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not exists"
+        )
+    await session.commit()
+    await invalidate_user(user_id)
+    return UserResponse.model_validate(user)
+
+
+@router.patch("/users/{user_id}/deactivate")
+async def deactivate_user(session: sessionDep, user_id: int) -> UserResponse:
+    return await _update_user(session, user_id, is_active=False)
+
+
+@router.patch("/users/{user_id}/promote")
+async def promote_user(session: sessionDep, user_id: int) -> UserResponse:
+    return await _update_user(session, user_id, is_admin=True)
+
+
+@router.get("/stats/db-pool")
+async def get_db_pool_stats():
+    """Состояние пула соединений текущего воркера."""
+    return pool_stats()
+
+
+@router.get("/stats/courses/{course_id}")
+async def get_course_stats_by_id(session: sessionDep, course_id: int):
+    """Записавшиеся, закончившие и распределение по шагам; не зависит от числа пользователей."""
+    return await get_course_stats(session, course_id)
+
+
+@router.post("/stats/reconcile")
+async def reconcile_stats(session: sessionDep):
+    if not await reconcile_course_stats(session):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Reconciliation is already running",
+        )
+    return {"status_code": status.HTTP_200_OK, "reconciled": True}
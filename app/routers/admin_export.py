@@ -0,0 +1,136 @@
+import csv
+import io
+import json
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated
+
+from app.backend.db import session_maker
+from app.backend.dp_depends import get_db
+from app.models import Course, Step, User, UserCourseProgress
+from app.utils.admin_check import is_admin
+
+
+router = APIRouter(prefix="/admin/export", dependencies=[Depends(is_admin)], tags=["admin"])
+
+sessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
+
+# сколько строк забираем с серверного курсора за раз
+BATCH_SIZE = 1000
+
+progress_course_id = func.coalesce(UserCourseProgress.course_id, 0)
+
+EXPORT_COLUMNS = (
+    User.id.label("user_id"),
+    User.username,
+    User.first_name,
+    User.last_name,
+    User.is_active,
+    User.is_admin,
+    progress_course_id.label("course_id"),
+    UserCourseProgress.current_step_id,
+    UserCourseProgress.is_completed,
+)
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _export_query(after_user_id: int | None, after_course_id: int):
+    # пользователь без прогресса выгружается одной строкой с course_id = 0
+    query = (
+        select(*EXPORT_COLUMNS)
+        .outerjoin(UserCourseProgress, UserCourseProgress.user_id == User.id)
+        .order_by(User.id, progress_course_id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    if after_user_id is not None:
+        query = query.where(
+            or_(
+                User.id > after_user_id,
+                and_(User.id == after_user_id, progress_course_id > after_course_id),
+            )
+        )
+    return query
+
+
+async def _batches(after_user_id: int | None, after_course_id: int):
+    # своя сессия: генератор живёт дольше обработчика и его зависимостей
+    async with session_maker() as session:
+        result = await session.stream(_export_query(after_user_id, after_course_id))
+        async for rows in result.partitions():
+            yield rows
+
+
+async def _ndjson(after_user_id: int | None, after_course_id: int):
+    async for rows in _batches(after_user_id, after_course_id):
+        yield "".join(json.dumps(row._asdict(), ensure_ascii=False) + "\n" for row in rows)
+
+
+async def _csv(after_user_id: int | None, after_course_id: int):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column.key for column in EXPORT_COLUMNS)
+    yield buffer.getvalue()
+    async for rows in _batches(after_user_id, after_course_id):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+@router.get("/users")
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    after_user_id: int | None = None,
+    after_course_id: int = 0,
+):
+    """Пользователи и их прогресс по курсам, по строке на пару (пользователь, курс).
+
+    Чтобы продолжить оборвавшуюся выгрузку, передайте user_id и course_id
+    последней полученной строки.
+    """
+    stream = _ndjson if format == "ndjson" else _csv
+    return StreamingResponse(
+        stream(after_user_id, after_course_id),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+# поля CreateStep: выгрузку можно отдать обратно в /admin/import/course/ndjson
+STEP_EXPORT_COLUMNS = (Step.title, Step.order, Step.text_content, Step.image_url, Step.video_url, Step.is_end)
+
+
+async def _course_ndjson(course: dict):
+    yield json.dumps(course, ensure_ascii=False) + "\n"
+    async with session_maker() as session:
+        result = await session.stream(
+            select(*STEP_EXPORT_COLUMNS)
+            .where(Step.course_id == course["id"], Step.is_active)
+            .order_by(Step.order)
+            .execution_options(yield_per=BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield "".join(json.dumps(row._asdict(), ensure_ascii=False) + "\n" for row in rows)
+
+
+@router.get("/course/{course_id}")
+async def export_course(session: sessionDep, course_id: int):
+    """Курс в формате импорта NDJSON: первая строка - курс с version, дальше активные шаги по order."""
+    course = (await session.execute(
+        select(Course.id, Course.title, Course.description, Course.version).where(Course.id == course_id)
+    )).first()
+    if course is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No courses found with this course_id",
+        )
+    return StreamingResponse(
+        _course_ndjson(course._asdict()),
+        media_type=MEDIA_TYPES["ndjson"],
+        headers={"Content-Disposition": f'attachment; filename="course-{course_id}.ndjson"'},
+    )
@@ -0,0 +1,187 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy import String, any_, bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated
+
+from app.backend.dp_depends import get_db
+from app.models import Course, Step
+from app.schemas import ImportCourse, ImportCourseResponse, ImportedStep
+from app.utils.admin_check import is_admin
+from app.utils.course_outline import invalidate_outline
+from app.utils.http_cache import invalidate_catalog
+
+
+router = APIRouter(prefix="/admin/import", dependencies=[Depends(is_admin)], tags=["admin"])
+
+sessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
+
+# 7 колонок на шаг, asyncpg принимает до 32767 параметров в запросе
+INSERT_BATCH_SIZE = 1000
+
+
+async def _upsert_course(session: AsyncSession, data: ImportCourse) -> tuple[int, int]:
+    query = insert(Course).values(title=data.title, description=data.description)
+    query = query.on_conflict_do_update(
+        index_elements=[Course.title],
+        set_={
+            "description": query.excluded.description,
+            "is_active": True,
+            "version": Course.version + 1,
+        },
+        where=None if data.version is None else Course.version == data.version,
+    )
+    row = (await session.execute(query.returning(Course.id, Course.version))).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Course was changed by someone else, reload it and retry",
+        )
+    return row.id, row.version
+
+
+async def _free_step_titles(session: AsyncSession, course_id: int, data: ImportCourse):
+    """Готовит названия шагов к upsert, который обновляет шаги по order.
+
+    Названия шагов уникальны глобально. Занятое шагом другого курса - явный
+    409 с этим названием. Название, которое внутри курса переезжает на другой
+    order (например, два шага поменялись названиями), сначала снимается со
+    старого шага: иначе upsert упрётся в уникальность посреди обмена.
+    """
+    orders = {step.title: step.order for step in data.steps}
+    titles = bindparam("titles", list(orders), type_=ARRAY(String))
+    rows = (await session.execute(
+        select(Step.id, Step.title, Step.order, Step.course_id).where(Step.title == any_(titles))
+    )).all()
+    taken = sorted(row.title for row in rows if row.course_id != course_id)
+    if taken:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Step titles are already used in other courses: {', '.join(taken)}",
+        )
+    moving = [row.id for row in rows if row.order != orders[row.title]]
+    if moving:
+        # временное название уникально и короче лимита; шаг получит новое в upsert
+        # или, если его order пропал из курса, останется выключенным с ним
+        await session.execute(
+            update(Step).where(Step.id.in_(moving)).values(title=func.concat("~", Step.id))
+        )
+
+
+async def _upsert_steps(session: AsyncSession, course_id: int, data: ImportCourse) -> list[ImportedStep]:
+    imported = []
+    for start in range(0, len(data.steps), INSERT_BATCH_SIZE):
+        rows = [
+            {
+                "course_id": course_id,
+                "order": step.order,
+                "title": step.title,
+                "text_content": step.text_content,
+                "image_url": step.image_url,
+                "video_url": step.video_url,
+                "is_end": step.is_end,
+            }
+            for step in data.steps[start:start + INSERT_BATCH_SIZE]
+        ]
+        query = insert(Step).values(rows)
+        query = query.on_conflict_do_update(
+            constraint="uq_steps_course_id_order",
+            set_={
+                "title": query.excluded.title,
+                "text_content": query.excluded.text_content,
+                "image_url": query.excluded.image_url,
+                "video_url": query.excluded.video_url,
+                "is_end": query.excluded.is_end,
+                "is_active": True,
+            },
+        )
+        result = await session.execute(query.returning(Step.id, Step.order))
+        imported.extend(ImportedStep(id=row.id, order=row.order) for row in result)
+    return imported
+
+
+async def _import_course(session: AsyncSession, data: ImportCourse) -> ImportCourseResponse:
+    try:
+        course_id, version = await _upsert_course(session, data)
+        await _free_step_titles(session, course_id, data)
+        steps = await _upsert_steps(session, course_id, data)
+        if version > 1:
+            # шаги, которых нет в новой версии, выключаем: на них может ссылаться прогресс
+            await session.execute(
+                update(Step)
+                .where(Step.course_id == course_id, Step.order.not_in([step.order for step in data.steps]))
+                .values(is_active=False)
+            )
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Step title is already used by another step",
+        )
+    invalidate_outline(course_id)
+    await invalidate_catalog(course_id)
+    steps.sort(key=lambda step: step.order)
+    return ImportCourseResponse(
+        status_code=status.HTTP_200_OK, course_id=course_id, version=version, steps=steps
+    )
+
+
+@router.post("/course")
+async def import_course(session: sessionDep, course_data: ImportCourse) -> ImportCourseResponse:
+    """Создаёт курс со всеми шагами или обновляет курс с тем же title одной транзакцией."""
+    return await _import_course(session, course_data)
+
+
+async def _ndjson_lines(request: Request):
+    # bytearray дописывается на месте; перевод строки ищем только в новом куске,
+    # поэтому длинная строка из многих кусков не сканируется заново
+    buffer = bytearray()
+    async for chunk in request.stream():
+        start = len(buffer)
+        buffer += chunk
+        end = buffer.rfind(b"\n", start)
+        if end == -1:
+            continue
+        for line in buffer[:end].split(b"\n"):
+            if line.strip():
+                yield line
+        del buffer[:end + 1]
+    if buffer.strip():
+        yield buffer
+
+
+@router.post("/course/ndjson")
+async def import_course_ndjson(session: sessionDep, request: Request) -> ImportCourseResponse:
+    """Тот же импорт потоком NDJSON: первая строка - курс, каждая следующая - шаг."""
+    header = None
+    steps = []
+    line_number = 0
+    async for line in _ndjson_lines(request):
+        line_number += 1
+        try:
+            item = json.loads(line)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid JSON on line {line_number}",
+            )
+        if header is None:
+            if not isinstance(item, dict):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="First line must be a course object",
+                )
+            header = item
+        else:
+            steps.append(item)
+    try:
+        course_data = ImportCourse.model_validate({**(header or {}), "steps": steps})
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors(include_url=False))
+    return await _import_course(session, course_data)
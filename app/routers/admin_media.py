@@ -0,0 +1,122 @@
+import asyncio
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.dp_depends import get_db
+from app.backend.media import MediaTooLarge, media_storage, thumbnailer
+from app.config import media_settings
+from app.models import MediaAsset, Step
+from app.routers.media import is_scriptable, media_url, thumbnail_url
+from app.schemas import MediaResponse
+from app.utils.admin_check import is_admin
+from app.utils.http_cache import invalidate_catalog
+
+
+router = APIRouter(prefix="/admin/media", dependencies=[Depends(is_admin)], tags=["admin"])
+
+sessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
+
+# какое поле шага получает ссылку на файл данного типа
+STEP_FIELDS = {"image": "image_url", "video": "video_url"}
+
+
+async def _lock_digest(session: AsyncSession, digest: str):
+    """Блокировка файла digest до конца транзакции.
+
+    Под ней загрузка проверяет, есть ли файл, и сохраняет запись, а очистка
+    решает, удалять ли файл. Без неё очистка могла удалить файл, который
+    параллельная загрузка того же содержимого уже сочла существующим.
+    """
+    await session.execute(select(func.pg_advisory_xact_lock(int(digest[:15], 16))))
+
+
+async def _drop_orphan(session: AsyncSession, digest: str):
+    """Удаляет только что записанный файл, если запись о нём так и не появилась.
+
+    Параллельная загрузка того же файла могла успеть сохранить свою запись -
+    тогда файл нужен ей.
+    """
+    await _lock_digest(session, digest)
+    exists = await session.scalar(select(MediaAsset.sha256).where(MediaAsset.sha256 == digest))
+    if exists is None:
+        await media_storage.delete(digest)
+    await session.commit()
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def upload_media(
+    request: Request,
+    session: sessionDep,
+    filename: Annotated[str | None, Query(max_length=255)] = None,
+    step_id: Annotated[int | None, Query(description="записать ссылку в image_url или video_url шага")] = None,
+) -> MediaResponse:
+    """Тело запроса - сам файл, Content-Type - его тип (image/* или video/*).
+
+    Файл пишется на диск по мере получения, целиком в памяти не держится.
+    """
+    content_type = request.headers.get("content-type", "").partition(";")[0].strip().lower()
+    kind = content_type.partition("/")[0]
+    if kind not in STEP_FIELDS or is_scriptable(content_type):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Only image/* and video/* uploads are supported, except SVG",
+        )
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > media_settings.MEDIA_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail="File is too large")
+
+    try:
+        digest, size, tmp_path = await media_storage.stage(request.stream())
+    except MediaTooLarge:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail="File is too large")
+    if size == 0:
+        await media_storage.discard(tmp_path)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+
+    stored = False
+    try:
+        await _lock_digest(session, digest)
+        stored = await media_storage.commit(tmp_path, digest)
+        created = await session.scalar(
+            insert(MediaAsset)
+            .values(sha256=digest, content_type=content_type, size=size, original_name=filename)
+            .on_conflict_do_nothing(index_elements=[MediaAsset.sha256])
+            .returning(MediaAsset.sha256)
+        ) is not None
+        course_id = None
+        if step_id is not None:
+            course_id = await session.scalar(
+                update(Step)
+                .where(Step.id == step_id)
+                .values({STEP_FIELDS[kind]: media_url(digest)})
+                .returning(Step.course_id)
+            )
+            if course_id is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Step not found")
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        await media_storage.discard(tmp_path)
+        if stored:
+            await _drop_orphan(session, digest)
+        raise
+    if course_id is not None:
+        await invalidate_catalog(course_id, listing=False)
+
+    is_image = kind == "image" and thumbnailer.enabled
+    # и для уже известного файла: прошлая миниатюра могла не получиться
+    if is_image and not await asyncio.to_thread(media_storage.has_thumbnail, digest):
+        thumbnailer.submit(digest)
+    return MediaResponse(
+        sha256=digest,
+        url=media_url(digest),
+        thumbnail_url=thumbnail_url(digest) if is_image else None,
+        content_type=content_type,
+        size=size,
+        created=created,
+        step_id=step_id,
+    )
@@ -16,10 +16,10 @@ from app.backend.dp_depends import get_db
 from typing import Annotated
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from app.utils.pw_utils import check_pw, hash_pw
-from app.utils.current_user import get_current_user, create_access_token_by_refresh_token
+from app.utils.pw_utils import password_hasher
+from app.utils.current_user import get_current_user, create_access_token_by_refresh_token, get_access_token_from_cookie
 from app.config import settings
-from app.utils.jwt_token import token_to_payload, jwt_encode_token
+from app.utils.jwt_token import decode_token_of_type, token_to_payload, jwt_encode_token, revoke_token
 import jwt
 from jwt.exceptions import (
     InvalidSubjectError,
@@ -32,7 +32,7 @@ from fastapi.security import OAuth2PasswordBearer
 
 router = APIRouter(prefix="/cookie_auth", tags=["Auth"])
 
-sessionDep = Annotated[AsyncSession, Depends(get_db)]
+sessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
 
 from app.utils.jwt_token import create_access_token, create_refresh_token
 
@@ -45,7 +45,7 @@ async def login_cookie(
     user = await session.scalar(select(User).where(User.username == user_data.username))
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
-    if check_pw(user_data.password, user.hashed_password):
+    if await password_hasher.check(user_data.password, user.hashed_password):
        access = create_access_token(response=response, user=user)
        refresh = create_refresh_token(response=response, user=user)
        return TokenInfo(
@@ -74,8 +74,24 @@ async def create_new_access_by_refresh(
 
 
 @router.get("/logout")
-async def logout_user(response: Response, user: User = Depends(get_current_user)):
+async def logout_user(
+    request: Request,
+    response: Response,
+    session: sessionDep,
+    user: User = Depends(get_current_user),
+    token: str = Depends(get_access_token_from_cookie),
+):
+    payloads = [token_to_payload(token)]
+    # refresh токен отзываем тоже, иначе по нему выпускаются новые access токены
+    refresh_token = request.cookies.get("refresh_token")
+    if refresh_token:
+        try:
+            payloads.append(decode_token_of_type(refresh_token, "refresh_token"))
+        except HTTPException:
+            pass
+    await revoke_token(session, *payloads)
     response.delete_cookie("access_token")
+    response.delete_cookie("refresh_token")
     return {
         "user": UserResponse(
             username=user.username,
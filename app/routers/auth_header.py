@@ -7,16 +7,17 @@ from app.backend.dp_depends import get_db
 from typing import Annotated
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from app.utils.pw_utils import check_pw, hash_pw
+from app.utils.pw_utils import password_hasher
 from app.config import settings
 from app.utils.jwt_token import jwt_encode_token, token_to_payload
+from app.utils.current_user import get_user_from_sub
 
 from jwt.exceptions import InvalidSubjectError, InvalidTokenError, PyJWTError, ExpiredSignatureError
 
 from fastapi.security import OAuth2PasswordBearer
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="users/auth/login")
 
-sessionDep = Annotated[AsyncSession, Depends(get_db)]
+sessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
 
 router = APIRouter(prefix="/auth")
 
@@ -28,7 +29,7 @@ async def login_authenticate(session: sessionDep, user_data: Annotated[UserLogin
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Please register before login",
         )
-    if check_pw(user_data.password, user.hashed_password):
+    if await password_hasher.check(user_data.password, user.hashed_password):
         access_token = jwt_encode_token(
             payload={
                 "sub": str(user.id),
@@ -50,17 +51,9 @@ async def get_current_user(
     session: sessionDep,
     token: str = Depends(oauth2_scheme),  
 ) -> User:
-    print(token)
     try:
         payload = token_to_payload(token=token)
-        user_id: str | None = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401,
-                                detail="Invalid token payload")
-        user = await session.scalar(select(User).where(User.id == int(user_id)))
-        if not user or not user.is_active:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
+        return await get_user_from_sub(session=session, payload=payload)
     except (InvalidSubjectError, InvalidTokenError, PyJWTError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
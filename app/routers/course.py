@@ -1,5 +1,6 @@
-from app.backend.dp_depends import get_db
-from fastapi import Body, Depends, APIRouter, HTTPException, status
+from app.backend.dp_depends import get_db, get_read_db
+from app.backend.outbox import add_event
+from fastapi import Body, Depends, APIRouter, HTTPException, Request, status
 from sqlalchemy import select, insert, delete, update
 from typing import Optional, Annotated
 from app.schemas import CreateCourse, CourseResponse, StepResponse, StepWithProgressResponse, UserProgressResponse
@@ -7,41 +8,65 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from app.models import Course, User, Step, UserCourseProgress
 from app.utils.current_user import get_current_user
+from app.utils.course_outline import get_outline, invalidate_outline
+from app.utils.course_stats import record_move, record_reset, record_start
+from app.utils.http_cache import LISTING_TAG, cached_json_response, course_tag
+from app.utils.navigation import move_to_next_step, move_to_previous_step
+from app.utils import read_models
+from app.utils.pagination import DEFAULT_PAGE_SIZE, afterQuery, limitQuery
+from app.utils.serialization import FastJSONResponse
 
 
 router = APIRouter(prefix="/course", tags=["course"])
 
-sessionDep = Annotated[AsyncSession, Depends(get_db)]
+sessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
+readSessionDep = Annotated[AsyncSession, Depends(get_read_db, scope="function")]
 
 
-@router.get("/")
-async def get_courses(session: sessionDep):
-    all_courses = await session.scalars(select(Course).where(Course.is_active == True))
-    all_courses = all_courses.all()
-    if all_courses:
-        # courses = [{"id": c.id, "title": c.title, "description": c.description} for c in all_courses]
-        courses = []
-        for course in all_courses:
-            course_data = CourseResponse(
-                id=course.id, title=course.title, description=course.description
-            )
-            courses.append(course_data)
-        return {"status_code": status.HTTP_200_OK, "courses": courses}
+async def _load_courses(session: AsyncSession, limit: int, after: str | None):
+    courses, cursor = await read_models.active_courses(session, limit, after)
+    if courses or after:
+        return {
+            "status_code": status.HTTP_200_OK,
+            "courses": [course._asdict() for course in courses],
+            "next_cursor": cursor,
+        }
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND, detail="There is no active course."
     )
 
-@router.get("/{course_id}", response_model=CourseResponse)
-async def get_course_by_id(session: sessionDep, course_id: int):
-    course = await session.scalar(
-        select(Course).where(Course.is_active == True, Course.id == course_id)
+
+@router.get("/")
+async def get_courses(
+    request: Request,
+    session: readSessionDep,
+    limit: limitQuery = DEFAULT_PAGE_SIZE,
+    after: afterQuery = None,
+):
+    return await cached_json_response(
+        request,
+        key=("courses", limit, after),
+        tags=[LISTING_TAG],
+        build=lambda: _load_courses(session, limit, after),
     )
+
+
+async def _load_course(session: AsyncSession, course_id: int):
+    course = await read_models.active_course(session, course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="There is no active course."
         )
-    return CourseResponse(
-        id=course.id, title=course.title, description=course.description
+    return course._asdict()
+
+
+@router.get("/{course_id}", response_model=CourseResponse)
+async def get_course_by_id(request: Request, session: readSessionDep, course_id: int):
+    return await cached_json_response(
+        request,
+        key=("course", course_id),
+        tags=[course_tag(course_id)],
+        build=lambda: _load_course(session, course_id),
     )
 
 
@@ -51,24 +76,25 @@ async def start_course(
     session: sessionDep,
     user: User = Depends(get_current_user),
 ):
-    step = await session.scalar(
-        select(Step)
-        .where(Step.course_id == course_id, Step.is_active == True)
-        .order_by(Step.order.asc())
-    )
-    if not step:
+    first_step = (await get_outline(session, course_id)).first_step()
+    if not first_step:
         raise HTTPException(status_code=404, detail="Course has no active steps")
 
     user_progress = await session.get(
         UserCourseProgress, {"user_id": user.id, "course_id": course_id}
     )
     if not user_progress:
+        step = await session.get(Step, first_step.id)
+        if not step:
+            invalidate_outline(course_id)
+            raise HTTPException(status_code=404, detail="Course has no active steps")
         user_progress = UserCourseProgress(
             user_id=user.id, course_id=course_id, current_step_id=step.id
         )
         session.add(user_progress)
+        add_event(session, "course_started", user_id=user.id, course_id=course_id, step_id=step.id)
+        await record_start(session, course_id, step.id)
         await session.commit()
-        await session.refresh(user_progress)
         return {
             "start": "Successful",
             "first_step": StepResponse(
@@ -94,18 +120,16 @@ async def start_course(
 @router.get("/progress/{course_id}", response_model=UserProgressResponse)
 async def get_user_progress(
     course_id: int,
-    session: sessionDep,
+    session: readSessionDep,
     user: User = Depends(get_current_user),
 ):
-    user_progress = await session.get(
-        UserCourseProgress, {"user_id": user.id, "course_id": course_id}
-    )
+    user_progress = await read_models.user_progress(session, user.id, course_id)
     if not user_progress:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User has no progress in this course",
         )
-    return user_progress
+    return FastJSONResponse(user_progress._asdict())
 
 
 @router.get("/{course_id}/back", response_model=StepResponse)
@@ -114,33 +138,13 @@ async def back_step_course(
     session: sessionDep,
     user: User = Depends(get_current_user),
 ):
-    user_progress = await session.scalar(
-        select(UserCourseProgress).
-        options(joinedload(UserCourseProgress.current_step)).
-        filter_by(user_id = user.id,course_id = course_id),    
-    )
-    
-    if not user_progress or not user_progress.current_step:
-        raise HTTPException(404, "User progress or step not found")
-    current_step_order = user_progress.current_step.order
-    if current_step_order == 1:
-        return user_progress.current_step
-
-    back_step = await session.scalar(
-        select(Step)
-        .where(Step.course_id == course_id, 
-               Step.is_active == True, 
-               Step.order < current_step_order)
-               .order_by(Step.order.desc()))
-    if not back_step:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Step back, not found"
-        )
-
-    user_progress.current_step_id = back_step.id
+    back_step = await move_to_previous_step(session, user_id=user.id, course_id=course_id)
+    # на первом шаге переход не случился и previous_step_id нет
+    previous_step_id = getattr(back_step, "previous_step_id", None)
+    if previous_step_id is not None:
+        await record_move(session, course_id, previous_step_id, back_step.id)
     await session.commit()
-    return back_step
+    return StepResponse.model_validate(back_step)
 
 @router.get("/{course_id}/next", response_model=StepWithProgressResponse)
 async def next_step_course(
@@ -148,38 +152,15 @@ async def next_step_course(
     session: sessionDep,
     user: User = Depends(get_current_user),
 ):
-    user_progress = await session.scalar(
-        select(UserCourseProgress).
-        options(joinedload(UserCourseProgress.current_step)).
-        filter_by(user_id = user.id,course_id = course_id),    
-    )
-    
-    if not user_progress or not user_progress.current_step:
-        raise HTTPException(404, "User progress or step not found")
-    
-    current_step_order = user_progress.current_step.order
-    next_step = await session.scalar(
-        select(Step)
-        .where(Step.course_id == course_id, 
-               Step.is_active == True, 
-               Step.order > current_step_order)
-        .order_by(Step.order.asc()))
-    
-    if not next_step:
-        if user_progress.is_completed:
-            raise HTTPException(409, "Course is already completed")  
-        raise HTTPException(
-            status_code=404,
-            detail=f"Next step not found"
-        )
-    user_progress.current_step_id = next_step.id
-    if next_step.is_end:
-        user_progress.is_completed = True
-
+    next_step = await move_to_next_step(session, user_id=user.id, course_id=course_id)
+    just_completed = next_step.progress_completed and not next_step.was_completed
+    if just_completed:
+        add_event(session, "course_completed", user_id=user.id, course_id=course_id, step_id=next_step.id)
+    await record_move(session, course_id, next_step.previous_step_id, next_step.id, completed=just_completed)
     await session.commit()
     return StepWithProgressResponse(
         step=StepResponse.model_validate(next_step),
-        is_completed=user_progress.is_completed
+        is_completed=next_step.progress_completed
     )
 
 
@@ -194,6 +175,8 @@ async def restart_course(
     if not user_progress:
         raise HTTPException(404, "No user progress in this course")
     await session.delete(user_progress)
+    add_event(session, "course_reset", user_id=user.id, course_id=course_id, step_id=user_progress.current_step_id)
+    await record_reset(session, course_id, user_progress.current_step_id, user_progress.is_completed)
     await session.commit()
     return {"message": "Progress successfully deleted",
             "deleted_progress": UserProgressResponse(
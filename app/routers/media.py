@@ -0,0 +1,88 @@
+import asyncio
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.dp_depends import get_read_db
+from app.backend.media import media_storage
+from app.config import media_settings
+from app.models import MediaAsset
+from app.utils.http_cache import etag_matches
+
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+readSessionDep = Annotated[AsyncSession, Depends(get_read_db, scope="function")]
+digestPath = Annotated[str, Path(pattern="^[0-9a-f]{64}$")]
+
+
+def is_scriptable(content_type: str) -> bool:
+    """SVG и прочие XML-картинки могут содержать скрипты: открытые как страница, это XSS."""
+    subtype = content_type.partition("/")[2]
+    return "svg" in subtype or "xml" in subtype
+
+
+def media_url(digest: str) -> str:
+    return f"/media/{digest}"
+
+
+def thumbnail_url(digest: str) -> str:
+    return f"/media/{digest}/thumbnail"
+
+
+def _offload_headers(path) -> dict:
+    if media_settings.MEDIA_OFFLOAD == "x-sendfile":
+        return {"X-Sendfile": str(path.resolve())}
+    relative = path.relative_to(media_storage.root).as_posix()
+    return {"X-Accel-Redirect": media_settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative}
+
+
+async def _file_response(
+    request: Request, path, etag: str, media_type: str, disposition: str = "inline"
+) -> Response:
+    """Отдаёт файл с поддержкой Range и If-None-Match.
+
+    Содержимое файла не меняется, поэтому ETag - его sha256, а кэшировать
+    можно без перепроверки. При MEDIA_OFFLOAD = "app" FileResponse отдаёт путь
+    серверу через http.response.pathsend, если сервер его поддерживает, иначе
+    (uvicorn) читает файл частями. Иначе ответ - только заголовки, а файл
+    отправляет nginx или Apache.
+
+    Тип файла задаёт загрузивший, поэтому браузеру запрещено угадывать тип
+    (nosniff), а открытый напрямую файл живёт в песочнице без скриптов.
+    """
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={media_settings.MEDIA_MAX_AGE_SECONDS}, immutable",
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "sandbox",
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if not await asyncio.to_thread(path.is_file):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media file not found")
+    # FileResponse без filename сам Content-Disposition не ставит
+    headers["Content-Disposition"] = disposition
+    if media_settings.MEDIA_OFFLOAD != "app":
+        return Response(media_type=media_type, headers={**headers, **_offload_headers(path)})
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+@router.get("/{digest}")
+async def get_media(request: Request, session: readSessionDep, digest: digestPath):
+    content_type = await session.scalar(select(MediaAsset.content_type).where(MediaAsset.sha256 == digest))
+    if content_type is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+    # загруженные до запрета SVG отдаём только на скачивание
+    disposition = "attachment" if is_scriptable(content_type) else "inline"
+    return await _file_response(request, media_storage.path(digest), f'"{digest}"', content_type, disposition)
+
+
+@router.get("/{digest}/thumbnail")
+async def get_thumbnail(request: Request, digest: digestPath):
+    return await _file_response(
+        request, media_storage.thumbnail_path(digest), f'"{digest}-thumbnail"', "image/jpeg"
+    )
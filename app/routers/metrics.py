@@ -0,0 +1,103 @@
+import os
+import secrets
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.backend.cache import cache
+from app.backend.db import pool_stats
+from app.backend.media import thumbnailer
+from app.backend.outbox import outbox_dispatcher
+from app.config import metrics_settings
+from app.utils.admin_check import is_admin
+from app.utils.compression import precompressed
+from app.utils.current_user import user_cache
+from app.utils.jwt_token import revoked_tokens, verified_tokens
+from app.utils.pw_utils import password_hasher
+
+
+def check_metrics_token(authorization: Annotated[str | None, Header()] = None):
+    expected = f"Bearer {metrics_settings.METRICS_TOKEN}"
+    if authorization is None or not secrets.compare_digest(authorization.encode(), expected.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+router = APIRouter(
+    tags=["metrics"],
+    dependencies=[Depends(check_metrics_token if metrics_settings.METRICS_TOKEN else is_admin)],
+)
+
+
+class StatsCollector:
+    """Отдаёт уже существующие stats() компонентов; читается только при опросе /metrics."""
+
+    def collect(self):
+        pool = pool_stats()
+        for name in ("size", "checked_out", "checked_in", "overflow"):
+            yield GaugeMetricFamily(f"db_pool_{name}", f"Primary pool {name}", value=pool[name])
+        yield CounterMetricFamily("db_pool_checkouts", "Pool checkouts", value=pool["checkouts"])
+        yield CounterMetricFamily(
+            "db_pool_checkout_wait_seconds", "Time spent waiting for a pool connection",
+            value=pool["checkout_wait_seconds_total"],
+        )
+        yield CounterMetricFamily(
+            "db_pool_connect_seconds", "Time spent opening new database connections",
+            value=pool["connect_seconds_total"],
+        )
+
+        hasher = password_hasher.stats()
+        yield GaugeMetricFamily("password_hash_queue_depth", "Hashes waiting for a worker", value=hasher["queue_depth"])
+        yield GaugeMetricFamily("password_hash_in_progress", "Hashes running", value=hasher["in_progress"])
+        yield CounterMetricFamily("password_hash_rejected", "Hashes rejected with 503", value=hasher["rejected"])
+
+        caches = {
+            "shared": cache.stats(),
+            "user": user_cache.stats(),
+            "jwt": verified_tokens.stats(),
+            "precompressed": precompressed.stats(),
+        }
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        for name, stats in caches.items():
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+        yield hits
+        yield misses
+
+        yield GaugeMetricFamily("revoked_tokens", "Revoked tokens in the deny-list", value=revoked_tokens.stats()["size"])
+
+        thumbnails = thumbnailer.stats()
+        yield GaugeMetricFamily("media_thumbnails_pending", "Thumbnails being generated", value=thumbnails["pending"])
+        yield CounterMetricFamily("media_thumbnails_generated", "Thumbnails generated", value=thumbnails["generated"])
+        yield CounterMetricFamily("media_thumbnails_failed", "Thumbnails that failed", value=thumbnails["failed"])
+
+        outbox = outbox_dispatcher.stats()
+        yield CounterMetricFamily("outbox_delivered", "Outbox events delivered", value=outbox["delivered"])
+        yield CounterMetricFamily("outbox_failed_batches", "Outbox batches that failed", value=outbox["failed_batches"])
+
+
+REGISTRY.register(StatsCollector())
+
+
+def _registry():
+    # несколько воркеров gunicorn: гистограммы пишутся в PROMETHEUS_MULTIPROC_DIR и
+    # собираются при опросе, а StatsCollector показывает воркер, ответивший на запрос
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(StatsCollector())
+    return registry
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(_registry()), media_type=CONTENT_TYPE_LATEST)
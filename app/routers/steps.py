@@ -1,45 +1,91 @@
-from app.backend.dp_depends import get_db
-from fastapi import Depends, APIRouter, HTTPException, status
+from app.backend.dp_depends import get_read_db
+from fastapi import Depends, APIRouter, HTTPException, Query, Request, status
 from sqlalchemy import select, insert, delete, update
 from typing import Optional, Annotated
 from app.schemas import (
     CreateCourse,
     CreateStep,
     StepResponse,
-    StepListItem,
     StepListResponse,
+    StepOutlineResponse,
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Course, User, Step
+from app.config import http_cache_settings
+from app.utils.http_cache import cached_json_response, course_tag
+from app.utils import read_models
+from app.utils.pagination import DEFAULT_PAGE_SIZE, afterQuery, limitQuery
 
 router = APIRouter(prefix="/steps", tags=["steps"])
 
-sessionDep = Annotated[AsyncSession, Depends(get_db)]
+readSessionDep = Annotated[AsyncSession, Depends(get_read_db, scope="function")]
 
-@router.get("/{course_id}", response_model=StepListResponse)
-async def get_all_steps(session: sessionDep, course_id: int):
-    all_steps = await session.scalars(select(Step).where(Step.course_id == course_id))
-    all_steps = all_steps.all()
-
-    if not all_steps:
+async def _load_steps(session: AsyncSession, course_id: int, limit: int, after: str | None, outline: bool):
+    columns = read_models.STEP_OUTLINE_COLUMNS if outline else read_models.STEP_LIST_COLUMNS
+    all_steps, cursor = await read_models.course_steps(session, course_id, limit, after, columns)
+    if not all_steps and not after:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="There are no steps in the course",
         )
-    steps_data = []
-    for step in all_steps:
-        step_item = StepListItem(
-            title=step.title,
-            step_image=step.image_url,
-            text_content=step.text_content,
-            video_url=step.video_url,
-            order=step.order,
-            status= "Закончен" if step.is_end else "Не закончен"
+    if outline:
+        steps = [step._asdict() for step in all_steps]
+    else:
+        steps = [
+            {
+                "title": step.title,
+                "step_image": step.step_image,
+                "text_content": step.text_content,
+                "video_url": step.video_url,
+                "order": step.order,
+                "status": "Закончен" if step.is_end else "Не закончен",
+            }
+            for step in all_steps
+        ]
+    return {
+        "status_code": status.HTTP_200_OK,
+        "course_id": course_id,
+        "steps": steps,
+        "next_cursor": cursor,
+    }
+
+
+@router.get("/{course_id}", response_model=StepListResponse | StepOutlineResponse)
+async def get_all_steps(
+    request: Request,
+    session: readSessionDep,
+    course_id: int,
+    limit: limitQuery = DEFAULT_PAGE_SIZE,
+    after: afterQuery = None,
+    outline: Annotated[bool, Query(description="только id, title, order и is_end, без содержимого шагов")] = False,
+):
+    return await cached_json_response(
+        request,
+        key=("steps", course_id, limit, after, outline),
+        tags=[course_tag(course_id)],
+        build=lambda: _load_steps(session, course_id, limit, after, outline),
+        precompress=True,
+    )
+
+
+async def _load_step(session: AsyncSession, course_id: int, step_id: int):
+    step = await read_models.course_step(session, course_id, step_id)
+    if not step:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Step not found",
         )
+    return step._asdict()
+
 
-        steps_data.append(step_item)
-    return StepListResponse(
-        status_code=status.HTTP_200_OK,
-        course_id=course_id,
-        steps=steps_data
+@router.get("/{course_id}/{step_id}", response_model=StepResponse)
+async def get_step(request: Request, session: readSessionDep, course_id: int, step_id: int):
+    """Содержимое одного шага: клиент берёт оглавление через ?outline=true и догружает шаги по мере надобности."""
+    return await cached_json_response(
+        request,
+        key=("step", course_id, step_id),
+        tags=[course_tag(course_id)],
+        build=lambda: _load_step(session, course_id, step_id),
+        max_age=http_cache_settings.STEP_MAX_AGE_SECONDS,
+        precompress=True,
     )
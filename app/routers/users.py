@@ -1,17 +1,20 @@
 from sqlalchemy.exc import IntegrityError
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy import select, update, insert
-from app.schemas import CourseResponse, CourseWithProgressResponse, UserCreateScheme, UserResponse
+from app.schemas import CourseResponse, UserCreateScheme, UserResponse
 from app.models import User, Course, UserCourseProgress, Step
-from app.backend.dp_depends import get_db
-from app.utils.pw_utils import hash_pw
+from app.backend.dp_depends import get_db, get_read_db
+from app.utils.pw_utils import password_hasher
 from typing import Annotated
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
+from app.utils import read_models
 from app.utils.current_user import get_current_user
+from app.utils.serialization import FastJSONResponse
 import bcrypt
 
-sessionDep = Annotated[AsyncSession, Depends(get_db)]
+sessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
+readSessionDep = Annotated[AsyncSession, Depends(get_read_db, scope="function")]
 
 
 router = APIRouter(prefix="/users", tags=['user'])
@@ -23,7 +26,7 @@ async def create_user(session: sessionDep, user_data: UserCreateScheme):
         first_name=user_data.first_name,
         last_name=user_data.last_name,
         username=user_data.username,
-        hashed_password=hash_pw(password=user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
     )
     session.add(user)
 
@@ -40,27 +43,13 @@ async def create_user(session: sessionDep, user_data: UserCreateScheme):
 
 @router.get("/my_courses")
 async def user_courses(
-    session: sessionDep,
+    session: readSessionDep,
     user: User = Depends(get_current_user)
 ):
-    user_progresses = await session.scalars(
-         select(UserCourseProgress)
-        .options(joinedload(UserCourseProgress.course))
-        .filter_by(user_id = user.id))
-    
-    progresses = user_progresses.all()
-    
-    if not progresses:
-        raise HTTPException(status_code=404, detail="User progress not found")
-    
-    courses = [CourseWithProgressResponse(
-                id = progress.course.id,
-                title=progress.course.title,
-                description=progress.course.description,
-                is_completed=progress.is_completed)
-            for progress in progresses]
+    courses = await read_models.user_courses(session, user.id)
     if not courses:
-         raise HTTPException(status_code=404, detail="User progress not found")
-    return {"status_code": status.HTTP_200_OK, "courses": courses}
+        raise HTTPException(status_code=404, detail="User progress not found")
+    courses = [course._asdict() for course in courses]
+    return FastJSONResponse({"status_code": status.HTTP_200_OK, "courses": courses})
 
 
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 class CreateCourse(BaseModel):
     title: str = Field(max_length=32)
@@ -26,6 +26,37 @@ class CreateStep(BaseModel):
     video_url: Optional[str] = Field(None)
     is_end: Optional[bool] = Field(default=False)
 
+class ImportCourseHeader(CreateCourse):
+    # версия, с которой работал клиент; если курс уже изменили, импорт вернёт 409
+    version: Optional[int] = Field(None, ge=1)
+
+
+class ImportCourse(ImportCourseHeader):
+    steps: List[CreateStep] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def check_steps_unique(self):
+        orders = [step.order for step in self.steps]
+        if len(set(orders)) != len(orders):
+            raise ValueError("Step orders must be unique")
+        titles = [step.title for step in self.steps]
+        if len(set(titles)) != len(titles):
+            raise ValueError("Step titles must be unique")
+        return self
+
+
+class ImportedStep(BaseModel):
+    id: int
+    order: int
+
+
+class ImportCourseResponse(BaseModel):
+    status_code: int
+    course_id: int
+    version: int
+    steps: List[ImportedStep]
+
+
 class StepResponse(BaseModel):
     id: int
     title: str
@@ -52,6 +83,19 @@ class StepListResponse(BaseModel):
     status_code: int
     course_id: int
     steps: List[StepListItem]
+    next_cursor: Optional[str] = None
+
+class StepOutlineItem(BaseModel):
+    id: int
+    title: str
+    order: int
+    is_end: bool
+
+class StepOutlineResponse(BaseModel):
+    status_code: int
+    course_id: int
+    steps: List[StepOutlineItem]
+    next_cursor: Optional[str] = None
 
 class UserCreateScheme(BaseModel):
     first_name: str = Field(max_length=32)
@@ -72,6 +116,10 @@ class UserResponse(BaseModel):
         from_attributes=True
     )
 
+class UserListResponse(BaseModel):
+    users: List[UserResponse]
+    next_cursor: Optional[str] = None
+
 class TokenInfo(BaseModel):
     access_token: str
     refresh_token: str | None = None
@@ -101,4 +149,15 @@ class UserScheme(BaseModel):
     username: str
     first_name: str
     last_name: str
-    is_active: bool
\ No newline at end of file
+    is_active: bool
+
+
+class MediaResponse(BaseModel):
+    sha256: str
+    url: str
+    # миниатюра делается в фоне и появляется чуть позже; None - не картинка
+    thumbnail_url: Optional[str] = None
+    content_type: str
+    size: int
+    created: bool
+    step_id: Optional[int] = None
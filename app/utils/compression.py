@@ -0,0 +1,244 @@
+import time
+import zlib
+from typing import Hashable
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import compression_settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import (
+    COMPRESSION_CPU_SAVED_SECONDS,
+    COMPRESSION_INPUT_BYTES,
+    COMPRESSION_SAVED_BYTES,
+    COMPRESSION_SECONDS,
+)
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость, без неё отдаём только gzip
+    brotli = None
+
+# в порядке предпочтения сервера при одинаковом q
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Выбирает кодировку по Accept-Encoding с учётом q; None - отдавать без сжатия."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def vary_on_encoding(headers: MutableHeaders):
+    if "accept-encoding" not in headers.get("vary", "").lower():
+        headers.add_vary_header("Accept-Encoding")
+
+
+def weak_etag(etag: str) -> str:
+    """Сжатое тело побайтно отличается от исходного, поэтому его ETag слабый."""
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=compression_settings.COMPRESSION_BROTLI_QUALITY)
+    # wbits=31 - формат gzip; в заголовке нет времени, поэтому результат детерминирован
+    compressor = zlib.compressobj(compression_settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def _compress_observed(body: bytes, encoding: str, source: str) -> tuple[bytes, float]:
+    started = time.perf_counter()
+    compressed = compress(body, encoding)
+    elapsed = time.perf_counter() - started
+    COMPRESSION_SECONDS.labels(encoding).observe(elapsed)
+    COMPRESSION_INPUT_BYTES.labels(encoding, source).inc(len(body))
+    COMPRESSION_SAVED_BYTES.labels(encoding, source).inc(len(body) - len(compressed))
+    return compressed, elapsed
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=compression_settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(compression_settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+        self.input_bytes = 0
+        self.output_bytes = 0
+        self.seconds = 0.0
+
+    def compress(self, chunk: bytes, last: bool) -> bytes:
+        started = time.perf_counter()
+        if self.encoding == "br":
+            output = self._compressor.process(chunk)
+            if last:
+                output += self._compressor.finish()
+        else:
+            output = self._compressor.compress(chunk)
+            output += self._compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+        self.seconds += time.perf_counter() - started
+        self.input_bytes += len(chunk)
+        self.output_bytes += len(output)
+        if last:
+            COMPRESSION_SECONDS.labels(self.encoding).observe(self.seconds)
+            COMPRESSION_INPUT_BYTES.labels(self.encoding, "dynamic").inc(self.input_bytes)
+            COMPRESSION_SAVED_BYTES.labels(self.encoding, "dynamic").inc(self.input_bytes - self.output_bytes)
+        return output
+
+
+class PrecompressedCache:
+    """Сжатые тела неизменяемых ответов, например содержимого шагов.
+
+    Ключ - ключ ответа, его ETag и кодировка. ETag - хэш тела, то есть версия
+    содержимого: после правки шага старые записи просто перестают
+    запрашиваться и вытесняются по LRU.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key: Hashable, etag: str, encoding: str, body: bytes | memoryview) -> bytes:
+        cache_key = (key, etag, encoding)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.hits += 1
+            compressed, seconds = cached
+            COMPRESSION_CPU_SAVED_SECONDS.labels(encoding).inc(seconds)
+            COMPRESSION_INPUT_BYTES.labels(encoding, "precompressed").inc(len(body))
+            COMPRESSION_SAVED_BYTES.labels(encoding, "precompressed").inc(len(body) - len(compressed))
+            return compressed
+        self._cache.misses += 1
+        compressed, seconds = _compress_observed(body, encoding, "precompressed")
+        self._cache.set(cache_key, (compressed, seconds))
+        return compressed
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+precompressed = PrecompressedCache(
+    maxsize=compression_settings.PRECOMPRESSED_CACHE_SIZE,
+    ttl=compression_settings.PRECOMPRESSED_CACHE_TTL_SECONDS,
+)
+
+
+def _compressible(scope, headers: Headers, status: int) -> bool:
+    if scope["method"] == "HEAD" or status in (204, 206, 304) or status < 200:
+        return False
+    if "content-encoding" in headers or "content-range" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    if not content_type.startswith(COMPRESSIBLE_TYPES):
+        return False
+    length = headers.get("content-length")
+    return length is None or int(length) >= compression_settings.COMPRESSION_MIN_SIZE
+
+
+class CompressionMiddleware:
+    """ASGI middleware: gzip/br по Accept-Encoding для текстовых ответов.
+
+    Тело целиком сжимается за один вызов, потоковые ответы - по частям.
+    Ответы, которые уже сжаты (Content-Encoding), проходят как есть - так
+    отдаются тела из PrecompressedCache.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        stream: _StreamCompressor | None = None
+        passthrough = False
+
+        def compressed_headers(message) -> MutableHeaders:
+            headers = MutableHeaders(scope=message)
+            headers["content-encoding"] = encoding
+            vary_on_encoding(headers)
+            if "etag" in headers:
+                headers["etag"] = weak_etag(headers["etag"])
+            return headers
+
+        async def send_wrapper(message):
+            nonlocal start_message, stream, passthrough
+            if message["type"] == "http.response.start":
+                if _compressible(scope, Headers(raw=message["headers"]), message["status"]):
+                    # заголовки отправим, когда станет видно тело
+                    start_message = message
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+            if passthrough or message["type"] != "http.response.body":
+                # тело пришло не через http.response.body (например, FileResponse
+                # через http.response.pathsend) - отдаём придержанные заголовки без сжатия
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if stream is None and start_message is not None:
+                if not more_body:
+                    if len(body) < compression_settings.COMPRESSION_MIN_SIZE:
+                        await send(start_message)
+                        await send(message)
+                    else:
+                        compressed, _ = _compress_observed(body, encoding, "dynamic")
+                        headers = compressed_headers(start_message)
+                        headers["content-length"] = str(len(compressed))
+                        await send(start_message)
+                        await send({"type": "http.response.body", "body": compressed})
+                    start_message = None
+                    return
+                stream = _StreamCompressor(encoding)
+                headers = compressed_headers(start_message)
+                del headers["content-length"]
+                await send(start_message)
+                start_message = None
+            await send({
+                "type": "http.response.body",
+                "body": stream.compress(body, last=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
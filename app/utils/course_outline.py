@@ -0,0 +1,102 @@
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.cache import cache
+from app.config import outline_cache_settings
+from app.models import Step
+from app.utils.cache import TTLCache
+from app.utils.http_cache import course_id_from_tag
+
+
+class OutlineStep(NamedTuple):
+    id: int
+    order: int
+    is_end: bool
+    is_active: bool
+
+
+class CourseOutline:
+    """Шаги курса по порядку с заранее посчитанными соседними активными шагами.
+
+    Неактивные шаги тоже лежат в оглавлении: пользователь может стоять на шаге,
+    который выключили, и из него всё равно нужно уметь перейти дальше.
+    """
+
+    __slots__ = ("course_id", "steps", "ids", "next_ids", "prev_ids", "_positions")
+
+    def __init__(self, course_id: int, steps: list[OutlineStep]):
+        self.course_id = course_id
+        self.steps = tuple(steps)
+        self.ids = [step.id for step in self.steps]
+        self._positions = {step_id: position for position, step_id in enumerate(self.ids)}
+        self.next_ids: list[int | None] = [None] * len(self.steps)
+        self.prev_ids: list[int | None] = [None] * len(self.steps)
+
+        nearest = None
+        for position in range(len(self.steps) - 1, -1, -1):
+            self.next_ids[position] = nearest
+            if self.steps[position].is_active:
+                nearest = self.steps[position].id
+        nearest = None
+        for position, step in enumerate(self.steps):
+            self.prev_ids[position] = nearest
+            if step.is_active:
+                nearest = step.id
+
+    def step(self, step_id: int) -> OutlineStep | None:
+        position = self._positions.get(step_id)
+        return None if position is None else self.steps[position]
+
+    def next_step(self, step_id: int) -> OutlineStep | None:
+        position = self._positions.get(step_id)
+        if position is None or self.next_ids[position] is None:
+            return None
+        return self.steps[self._positions[self.next_ids[position]]]
+
+    def prev_step(self, step_id: int) -> OutlineStep | None:
+        position = self._positions.get(step_id)
+        if position is None or self.prev_ids[position] is None:
+            return None
+        return self.steps[self._positions[self.prev_ids[position]]]
+
+    def first_step(self) -> OutlineStep | None:
+        return next((step for step in self.steps if step.is_active), None)
+
+
+outline_cache = TTLCache(
+    maxsize=outline_cache_settings.OUTLINE_CACHE_MAX_SIZE,
+    ttl=outline_cache_settings.OUTLINE_CACHE_TTL_SECONDS,
+)
+
+
+def outline_statement(course_id: int):
+    return (
+        select(Step.id, Step.order, Step.is_end, Step.is_active)
+        .where(Step.course_id == course_id)
+        .order_by(Step.order.asc())
+    )
+
+
+async def get_outline(session: AsyncSession, course_id: int) -> CourseOutline:
+    async def load():
+        rows = await session.execute(outline_statement(course_id))
+        return CourseOutline(course_id, [OutlineStep(*row) for row in rows])
+
+    return await outline_cache.get_or_load(course_id, load)
+
+
+def invalidate_outline(course_id: int):
+    outline_cache.delete(course_id)
+
+
+def _drop_invalidated_outlines(tags: list[str]):
+    # курс поменяли в любом воркере - оглавление этого воркера тоже устарело
+    for tag in tags:
+        course_id = course_id_from_tag(tag)
+        if course_id is not None:
+            invalidate_outline(course_id)
+
+
+cache.on_invalidate(_drop_invalidated_outlines)
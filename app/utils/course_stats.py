@@ -0,0 +1,200 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+from sqlalchemy import and_, case, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import session_maker
+from app.config import stats_settings
+from app.models import CourseStat, StepStat, UserCourseProgress
+
+logger = logging.getLogger(__name__)
+
+# ключ advisory lock: сверку в один момент делает только один воркер
+RECONCILE_LOCK_ID = 0x636F7374
+
+
+async def _apply(
+    session: AsyncSession,
+    course_id: int,
+    step_deltas: dict[int, int],
+    enrolled: int = 0,
+    completed: int = 0,
+):
+    """Прибавляет дельты к счётчикам в текущей транзакции.
+
+    Строки всегда блокируются в одном порядке - шаги по id, затем курс, -
+    поэтому встречные переходы не дают взаимоблокировок.
+    """
+    rows = [
+        {"course_id": course_id, "step_id": step_id, "users": delta}
+        for step_id, delta in sorted(step_deltas.items())
+        if delta
+    ]
+    if rows:
+        query = insert(StepStat).values(rows)
+        await session.execute(
+            query.on_conflict_do_update(
+                index_elements=[StepStat.course_id, StepStat.step_id],
+                set_={"users": StepStat.users + query.excluded.users},
+            )
+        )
+    if enrolled or completed:
+        query = insert(CourseStat).values(course_id=course_id, enrolled=enrolled, completed=completed)
+        await session.execute(
+            query.on_conflict_do_update(
+                index_elements=[CourseStat.course_id],
+                set_={
+                    "enrolled": CourseStat.enrolled + query.excluded.enrolled,
+                    "completed": CourseStat.completed + query.excluded.completed,
+                },
+            )
+        )
+
+
+async def record_start(session: AsyncSession, course_id: int, step_id: int):
+    await _apply(session, course_id, {step_id: 1}, enrolled=1)
+
+
+async def record_move(
+    session: AsyncSession,
+    course_id: int,
+    from_step_id: int | None,
+    to_step_id: int,
+    completed: bool = False,
+):
+    if from_step_id == to_step_id and not completed:
+        return
+    deltas = {to_step_id: 1}
+    if from_step_id is not None:
+        deltas[from_step_id] = deltas.get(from_step_id, 0) - 1
+    await _apply(session, course_id, deltas, completed=int(completed))
+
+
+async def record_reset(session: AsyncSession, course_id: int, step_id: int | None, was_completed: bool):
+    deltas = {} if step_id is None else {step_id: -1}
+    await _apply(session, course_id, deltas, enrolled=-1, completed=-int(was_completed))
+
+
+def _drift_statement(counted, stored, keys: list[str], values: list[str]):
+    """Разница пересчитанных и сохранённых счётчиков одним запросом.
+
+    Один запрос - один снимок: в нём прогресс и счётчики согласованы, потому
+    что обработчики меняют их в одной транзакции. Поэтому разница - это
+    только расхождение, накопленное правками в обход API.
+    """
+    join = counted.outerjoin(
+        stored, and_(*(counted.c[key] == stored.c[key] for key in keys)), full=True
+    )
+    deltas = [
+        (func.coalesce(counted.c[value], 0) - func.coalesce(stored.c[value], 0)).label(value)
+        for value in values
+    ]
+    return select(
+        *(func.coalesce(counted.c[key], stored.c[key]).label(key) for key in keys),
+        *deltas,
+    ).select_from(join).where(or_(*(delta != 0 for delta in deltas)))
+
+
+async def reconcile_course_stats(session: AsyncSession) -> bool:
+    """Сверяет счётчики с usercourseprogresss; False, если сверку уже делает другой воркер.
+
+    Таблицы не блокируются: расхождение считается по одному снимку и
+    прибавляется дельтами через _apply, как обычный переход. Дельты
+    обработчиков, работающих в это время, складываются с ними в любом
+    порядке, а блокируются только строки курсов, где нашлось расхождение.
+    """
+    locked = await session.scalar(select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_ID)))
+    if not locked:
+        return False
+    step_counts = (
+        select(
+            UserCourseProgress.course_id,
+            UserCourseProgress.current_step_id.label("step_id"),
+            func.count().label("users"),
+        )
+        .where(UserCourseProgress.current_step_id.is_not(None))
+        .group_by(UserCourseProgress.course_id, UserCourseProgress.current_step_id)
+        .subquery()
+    )
+    course_counts = (
+        select(
+            UserCourseProgress.course_id,
+            func.count().label("enrolled"),
+            func.count(case((UserCourseProgress.is_completed, 1))).label("completed"),
+        )
+        .group_by(UserCourseProgress.course_id)
+        .subquery()
+    )
+    step_drift = await session.execute(_drift_statement(
+        step_counts, StepStat.__table__.alias(), ["course_id", "step_id"], ["users"]
+    ))
+    course_drift = await session.execute(_drift_statement(
+        course_counts, CourseStat.__table__.alias(), ["course_id"], ["enrolled", "completed"]
+    ))
+
+    drift: dict[int, dict] = defaultdict(lambda: {"step_deltas": {}, "enrolled": 0, "completed": 0})
+    for row in step_drift:
+        drift[row.course_id]["step_deltas"][row.step_id] = row.users
+    for row in course_drift:
+        drift[row.course_id].update(enrolled=row.enrolled, completed=row.completed)
+    for course_id in sorted(drift):
+        await _apply(session, course_id, **drift[course_id])
+    if drift:
+        logger.info("Course stats drift fixed for %d courses", len(drift))
+    await session.commit()
+    return True
+
+
+async def get_course_stats(session: AsyncSession, course_id: int) -> dict:
+    course = (await session.execute(
+        select(CourseStat.enrolled, CourseStat.completed).where(CourseStat.course_id == course_id)
+    )).first()
+    steps = await session.execute(
+        select(StepStat.step_id, StepStat.users)
+        .where(StepStat.course_id == course_id, StepStat.users > 0)
+        .order_by(StepStat.step_id)
+    )
+    return {
+        "course_id": course_id,
+        "enrolled": course.enrolled if course else 0,
+        "completed": course.completed if course else 0,
+        "steps": [{"step_id": row.step_id, "users": row.users} for row in steps],
+    }
+
+
+class StatsReconciler:
+    """Периодическая сверка счётчиков, на случай правок прогресса в обход API."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with session_maker() as session:
+                    await reconcile_course_stats(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Course stats reconciliation failed")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+stats_reconciler = StatsReconciler(interval=stats_settings.STATS_RECONCILE_INTERVAL_SECONDS)
@@ -1,3 +1,4 @@
+from dataclasses import dataclass, field
 from fastapi import Depends, HTTPException, Request, Response, status 
 from sqlalchemy import select, update, insert
 from app.schemas import UserCreateScheme, UserResponse, UserLoginScheme, TokenInfo
@@ -7,8 +8,9 @@ from typing import Annotated
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from app.utils.pw_utils import check_pw, hash_pw
-from app.config import settings
-from app.utils.jwt_token import check_token_by_type, create_access_token, token_to_payload, jwt_encode_token
+from app.backend.cache import cache
+from app.config import settings, user_cache_settings
+from app.utils.jwt_token import check_token_by_type, create_access_token, decode_token_of_type, token_to_payload, jwt_encode_token, is_token_revoked
 import jwt
 from jwt.exceptions import (
     InvalidSubjectError,
@@ -19,7 +21,7 @@ from jwt.exceptions import (
 
 # from app.routers.auth_cookie import get_token_from_cookie
 
-sessionDep = Annotated[AsyncSession, Depends(get_db)]
+sessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
 
 
 
@@ -42,12 +44,63 @@ async def get_refresh_token_from_cookie(
     return token
 
 
+# в общий кэш кладём только публичные поля, без hashed_password
+CACHED_USER_FIELDS = ("id", "first_name", "last_name", "username", "is_active", "is_admin")
+
+
+def user_cache_key(user_id: int) -> str:
+    return cache.key("user", user_id)
+
+
+async def invalidate_user(user_id: int):
+    await cache.delete(user_cache_key(user_id))
+
+
+class UserCacheCounters:
+    """Попадания и промахи кэша пользователей в этом воркере; промах - запрос в БД."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserCacheCounters()
+
+
+async def load_active_user(session: AsyncSession, user_id: int) -> User | None:
+    if not user_cache_settings.USER_CACHE_ENABLED:
+        return await session.scalar(select(User).where(User.id == user_id))
+
+    loaded = False
+
+    async def load():
+        nonlocal loaded
+        loaded = True
+        user = await session.scalar(select(User).where(User.id == user_id))
+        if user is None:
+            return None
+        return {field_name: getattr(user, field_name) for field_name in CACHED_USER_FIELDS}
+
+    data = await cache.get_or_load(
+        user_cache_key(user_id), load, ttl=user_cache_settings.USER_CACHE_TTL_SECONDS
+    )
+    if loaded:
+        user_cache.misses += 1
+    else:
+        user_cache.hits += 1
+    # несвязанный с сессией объект, годится только для чтения полей
+    return None if data is None else User(**data)
+
+
 async def get_user_from_sub(session: sessionDep, payload:dict) -> User:
     try:
         user_id: str | None = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token payload")
-        user = await session.scalar(select(User).where(User.id == int(user_id)))
+        user = await load_active_user(session, int(user_id))
         if not user or not user.is_active:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -57,20 +110,86 @@ async def get_user_from_sub(session: sessionDep, payload:dict) -> User:
             detail="Invalid authentication credentials",
         )
 
+@dataclass(slots=True)
+class Principal:
+    """Пользователь, собранный из claims access токена без запроса в БД."""
+    id: int
+    username: str
+    first_name: str
+    last_name: str
+    is_active: bool
+    is_admin: bool
+    _user: User | None = field(default=None, repr=False)
+
+    async def load_user(self, session: AsyncSession) -> User:
+        # мимо кэша: в кэше нет всех колонок
+        if self._user is None:
+            user = await session.scalar(select(User).where(User.id == self.id))
+            if not user or not user.is_active:
+                raise HTTPException(status_code=401, detail="User not found")
+            self._user = user
+        return self._user
+
+
+PRINCIPAL_CLAIMS = ("sub", "username", "first_name", "last_name", "is_active", "is_admin")
+
+
+def principal_from_payload(payload: dict) -> Principal | None:
+    # старые токены без нужных claims проверяем через БД
+    if payload.get("type") != "access_token" or any(claim not in payload for claim in PRINCIPAL_CLAIMS):
+        return None
+    if not payload["is_active"]:
+        raise HTTPException(status_code=401, detail="User not found")
+    return Principal(
+        id=int(payload["sub"]),
+        username=payload["username"],
+        first_name=payload["first_name"],
+        last_name=payload["last_name"],
+        is_active=payload["is_active"],
+        is_admin=payload["is_admin"],
+    )
+
+
 async def get_current_user(
-    session: sessionDep, 
-    token: str = Depends(get_access_token_from_cookie)
+    # токен первым: без cookie отвечаем 401, даже не создавая сессию
+    token: Annotated[str, Depends(get_access_token_from_cookie)],
+    # primary, а не реплика: отстающая реплика вернула бы в кэш старые is_active/is_admin.
+    # Та же сессия, что у обработчика с sessionDep, - второе соединение из пула не берётся
+    session: sessionDep,
 ):
     payload = token_to_payload(token)
+    if is_token_revoked(payload):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
+    if settings.STATELESS_AUTH:
+        principal = principal_from_payload(payload)
+        if principal is not None:
+            return principal
     user = await get_user_from_sub(session=session, payload=payload)
     return user
+
+
+async def get_current_db_user(
+    session: sessionDep,
+    user: User | Principal = Depends(get_current_user),
+) -> User:
+    """Полная строка User, для обработчиков, которым не хватает claims."""
+    if isinstance(user, Principal):
+        return await user.load_user(session)
+    if user not in session:
+        # из кэша пришёл несвязанный User только с публичными полями
+        db_user = await session.get(User, user.id)
+        if not db_user or not db_user.is_active:
+            raise HTTPException(status_code=401, detail="User not found")
+        return db_user
+    return user
    
 async def create_access_token_by_refresh_token(
     response: Response,
-    session: sessionDep, 
+    session: sessionDep,
     refresh_token: str = Depends(get_refresh_token_from_cookie)
 ):
-    await check_token_by_type(refresh_token, "refresh_token")
-    payload = token_to_payload(refresh_token)
+    payload = decode_token_of_type(refresh_token, "refresh_token")
+    if is_token_revoked(payload):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
     user = await get_user_from_sub(session=session, payload=payload)
     return create_access_token(user, response)
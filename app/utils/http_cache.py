@@ -0,0 +1,103 @@
+import hashlib
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+
+from app.backend.cache import cache
+from app.config import compression_settings, http_cache_settings
+from app.utils.compression import negotiate_encoding, precompressed, weak_etag
+from app.utils.serialization import dump_json
+
+LISTING_TAG = "catalog:listing"
+
+
+COURSE_TAG_PREFIX = "catalog:course:"
+
+
+def course_tag(course_id: int) -> str:
+    return f"{COURSE_TAG_PREFIX}{course_id}"
+
+
+def course_id_from_tag(tag: str) -> int | None:
+    if not tag.startswith(COURSE_TAG_PREFIX):
+        return None
+    return int(tag.removeprefix(COURSE_TAG_PREFIX))
+
+
+async def invalidate_catalog(course_id: int | None = None, listing: bool = True):
+    """Сбрасывает закэшированные ответы курса и, если listing, список курсов, во всех воркерах."""
+    tags = [LISTING_TAG] if listing else []
+    if course_id is not None:
+        tags.append(course_tag(course_id))
+    await cache.invalidate_tags(*tags)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match сравнивается слабо: W/"x" совпадает с "x"
+    candidates = [candidate.strip().removeprefix("W/") for candidate in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def cached_json_response(
+    request: Request,
+    key: tuple,
+    tags: list[str],
+    build: Callable[[], Awaitable[Any]],
+    max_age: int | None = None,
+    precompress: bool = False,
+) -> Response:
+    """Отдаёт 304 по If-None-Match или закэшированное тело; build вызывается только при промахе.
+
+    max_age - Cache-Control для клиента, по умолчанию как у каталога.
+    precompress - хранить сжатые варианты тела, чтобы не сжимать его на
+    каждый запрос; для ответов, которые меняются только с версией данных.
+
+    ETag - хэш тела, поэтому он одинаковый во всех воркерах и переживает рестарт.
+    Он лежит и отдельным ключом с теми же тегами: условный запрос сверяется с
+    ним до загрузки тела, и 304 не требует ни тела, ни запроса в базу.
+
+    Тело может уйти сжатым (здесь или в CompressionMiddleware), поэтому и 200,
+    и 304 отдаются со слабым ETag и Vary: Accept-Encoding - кэши между
+    клиентом и сервером видят одно и то же представление.
+    """
+    if max_age is None:
+        max_age = http_cache_settings.CATALOG_MAX_AGE_SECONDS
+    ttl = http_cache_settings.RESPONSE_CACHE_TTL_SECONDS
+    etag_key = cache.key("http-etag", *key)
+
+    def headers_for(etag: str) -> dict:
+        return {
+            "ETag": weak_etag(etag),
+            "Cache-Control": f"public, max-age={max_age}",
+            "Vary": "Accept-Encoding",
+        }
+
+    if request.headers.get("if-none-match"):
+        etag = await cache.get(etag_key)
+        if etag is not None and etag_matches(request, etag):
+            return Response(status_code=304, headers=headers_for(etag))
+
+    async def load():
+        body = dump_json(await build())
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        await cache.set(etag_key, etag, ttl, tags)
+        # запись - ETag и тело через перевод строки, готовые байты без JSON
+        return etag.encode("ascii") + b"\n" + body
+
+    entry = await cache.get_or_load(cache.key("http", *key), load, ttl=ttl, tags=tags, raw=True)
+    split = entry.index(b"\n")
+    etag = entry[:split].decode("ascii")
+    headers = headers_for(etag)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    # тело отдаётся срезом записи без копии
+    body = memoryview(entry)[split + 1:]
+    if precompress and len(body) >= compression_settings.COMPRESSION_MIN_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            body = precompressed.get(key, etag, encoding, body)
+    return Response(content=body, media_type="application/json", headers=headers)
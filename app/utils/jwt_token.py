@@ -1,20 +1,46 @@
+import asyncio
 from datetime import datetime, timedelta, timezone
+import hashlib
+import logging
+import time
 from typing import Annotated
+from uuid import uuid4
 
 from fastapi import Depends, HTTPException, Response
+from app.models.revoked_token import RevokedToken
 from app.models.users import User
 from app.schemas import UserCreateScheme, UserLoginScheme, UserScheme
 import jwt
+from cryptography.hazmat.primitives.serialization import load_pem_private_key, load_pem_public_key
+from app.backend.cache import cache
 from app.config import settings
+from app.utils.cache import TTLCache
+from app.utils.metrics import JWT_SECONDS
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.backend.db import session_maker
 from app.backend.dp_depends import get_db
 
-sessionDep = Annotated[AsyncSession, Depends(get_db)]
+logger = logging.getLogger(__name__)
+
+sessionDep = Annotated[AsyncSession, Depends(get_db, scope="function")]
+
+# PEM разбираем один раз при старте, дальше работаем с объектами ключей
+PRIVATE_KEY = load_pem_private_key(settings.private_key.read_bytes(), password=None)
+PUBLIC_KEY = load_pem_public_key(settings.public_key.read_bytes())
+
+# sha256(token) -> payload уже проверенных токенов, запись живёт не дольше exp
+verified_tokens = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+
 
 def jwt_encode_token(
     payload: dict,
-    private_key = settings.private_key.read_text(),
-    algorithm = "RS256",
+    private_key = PRIVATE_KEY,
+    algorithm = settings.JWT_ALGORITHM,
     expires_delta: timedelta | None = None
 ):
     to_encode = payload.copy()
@@ -26,19 +52,46 @@ def jwt_encode_token(
     to_encode.update(
         exp=expire, 
         iat=now)
-    jwt_token = jwt.encode(payload=to_encode, key=private_key, algorithm=algorithm)
+    with JWT_SECONDS.labels("encode").time():
+        jwt_token = jwt.encode(payload=to_encode, key=private_key, algorithm=algorithm)
     return jwt_token
 
-def token_to_payload(
+
+def decode_token(
     token: str,
-    public_key = settings.public_key.read_text(),
-    algorithm = "RS256"
-) -> dict:
+    public_key = PUBLIC_KEY,
+    algorithm = settings.JWT_ALGORITHM
+) -> tuple[dict, str | None]:
+    """Проверяет подпись (или берёт результат из кэша), возвращает payload и тип токена."""
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = verified_tokens.get(digest)
+    if payload is not None:
+        verified_tokens.hits += 1
+        return payload, payload.get("type")
+    verified_tokens.misses += 1
     try:
-        payload = jwt.decode(jwt=token, key=public_key, algorithms=algorithm)
-        return payload
+        with JWT_SECONDS.labels("decode").time():
+            payload = jwt.decode(jwt=token, key=public_key, algorithms=[algorithm])
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    ttl = payload["exp"] - time.time() if "exp" in payload else verified_tokens.ttl
+    if ttl > 0:
+        verified_tokens.set(digest, payload, ttl=min(ttl, verified_tokens.ttl))
+    return payload, payload.get("type")
+
+
+def token_to_payload(token: str) -> dict:
+    payload, _ = decode_token(token)
+    return payload
+
+
+def decode_token_of_type(token: str, token_type: str) -> dict:
+    payload, current_type = decode_token(token)
+    if current_type != token_type:
+        raise HTTPException(401, f"Invalid token {current_type!r} expected {token_type!r}")
+    return payload
     
 
 def create_access_token(user: User, response: Response):
@@ -48,9 +101,14 @@ def create_access_token(user: User, response: Response):
         "first_name": user.first_name,
         "last_name": user.last_name,
         "is_active": user.is_active,
+        "is_admin": user.is_admin,
+        "jti": uuid4().hex,
     }
     payload.update(type="access_token")
-    access_token = jwt_encode_token(payload)
+    expires_delta = None
+    if settings.STATELESS_AUTH:
+        expires_delta = timedelta(minutes=settings.STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = jwt_encode_token(payload, expires_delta=expires_delta)
     response.set_cookie(
         key="access_token",
         value=access_token,
@@ -64,7 +122,8 @@ def create_access_token(user: User, response: Response):
 def create_refresh_token(response: Response, user : User):
     payload={
         "sub": str(user.id),
-        "username": user.username
+        "username": user.username,
+        "jti": uuid4().hex,
     }
     payload.update(type="refresh_token")
     refresh_token = jwt_encode_token(payload, expires_delta=timedelta(days=60))
@@ -80,8 +139,114 @@ def create_refresh_token(response: Response, user : User):
 
 
 async def check_token_by_type(token: str, token_type):
-    data = token_to_payload(token)
-    current_type = data.get("type")
-    if current_type == token_type:
-        return True
-    raise HTTPException(401, f"Invalid token {current_type!r} expected {token_type!r}")
+    decode_token_of_type(token, token_type)
+    return True
+
+
+REVOKED_TAG_PREFIX = "revoked-token:"
+
+
+class RevokedTokens:
+    """Deny-list отозванных jti.
+
+    Источник правды - таблица revokedtokens: она не вытесняет записи, как
+    кэш. В каждом воркере лежит её копия в памяти без ограничения размера,
+    записи уходят из неё только после exp токена. О новом отзыве воркеры
+    узнают через канал инвалидаций кэша, а периодическая сверка с таблицей
+    догоняет потерянные сообщения и заодно удаляет истёкшие строки.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._expires: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+
+    def __contains__(self, jti: str) -> bool:
+        expires = self._expires.get(jti)
+        return expires is not None and expires > time.time()
+
+    def add(self, jti: str, expires: float):
+        self._expires[jti] = expires
+
+    def clear(self):
+        self._expires.clear()
+
+    def _on_invalidate(self, tags: list[str]):
+        for tag in tags:
+            if tag.startswith(REVOKED_TAG_PREFIX):
+                jti, _, expires = tag.removeprefix(REVOKED_TAG_PREFIX).rpartition(":")
+                self.add(jti, float(expires))
+
+    async def sync(self):
+        async with session_maker() as session:
+            await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= func.now()))
+            rows = await session.execute(select(RevokedToken.jti, RevokedToken.expires_at))
+            await session.commit()
+        # сливаем, а не заменяем: add() мог сработать, пока ждали базу
+        for row in rows:
+            self.add(row.jti, row.expires_at.timestamp())
+        now = time.time()
+        for jti in [jti for jti, expires in self._expires.items() if expires <= now]:
+            del self._expires[jti]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Revoked tokens sync failed")
+
+    async def start(self):
+        await self.sync()
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"size": len(self._expires)}
+
+
+revoked_tokens = RevokedTokens(interval=settings.REVOKED_TOKENS_SYNC_SECONDS)
+cache.on_invalidate(revoked_tokens._on_invalidate)
+
+
+async def revoke_token(session: AsyncSession, *payloads: dict):
+    """Записывает jti токенов в deny-list до истечения срока каждого токена."""
+    now = time.time()
+    revoked = {
+        payload["jti"]: payload["exp"]
+        for payload in payloads
+        if payload.get("jti") and payload.get("exp", 0) > now
+    }
+    if not revoked:
+        return
+    await session.execute(
+        insert(RevokedToken)
+        .values([
+            {"jti": jti, "expires_at": datetime.fromtimestamp(expires, timezone.utc)}
+            for jti, expires in revoked.items()
+        ])
+        .on_conflict_do_nothing()
+    )
+    await session.commit()
+    for jti, expires in revoked.items():
+        revoked_tokens.add(jti, expires)
+    await cache.invalidate_tags(
+        *(f"{REVOKED_TAG_PREFIX}{jti}:{expires}" for jti, expires in revoked.items())
+    )
+
+
+def is_token_revoked(payload: dict) -> bool:
+    jti = payload.get("jti")
+    return jti is not None and jti in revoked_tokens
@@ -0,0 +1,149 @@
+import time
+from collections import Counter as StatementCounter
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.backend.db import engine, replicas
+
+
+REQUEST_COUNT = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements per HTTP request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request", ["method", "route"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "bcrypt time, without waiting in the queue",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2.5),
+)
+JWT_SECONDS = Histogram(
+    "jwt_duration_seconds",
+    "JWT signing and signature verification time",
+    ["operation"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025),
+)
+COMPRESSION_SECONDS = Histogram(
+    "http_compression_duration_seconds",
+    "Response compression CPU time",
+    ["encoding"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+COMPRESSION_INPUT_BYTES = Counter(
+    "http_compression_input_bytes_total",
+    "Response bytes before compression",
+    ["encoding", "source"],
+)
+COMPRESSION_SAVED_BYTES = Counter(
+    "http_compression_saved_bytes_total",
+    "Response bytes not sent thanks to compression",
+    ["encoding", "source"],
+)
+COMPRESSION_CPU_SAVED_SECONDS = Counter(
+    "http_compression_cpu_saved_seconds_total",
+    "Compression time avoided by precompressed cache hits",
+    ["encoding"],
+)
+
+
+@dataclass(slots=True)
+class RequestDbStats:
+    queries: int = 0
+    seconds: float = 0.0
+    # текст запроса -> сколько раз выполнен; собирается только профайлером
+    statements: StatementCounter | None = None
+
+
+# счётчики текущего HTTP запроса; вне запроса (фоновые задачи) - None
+request_db_stats: ContextVar[RequestDbStats | None] = ContextVar("request_db_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    DB_QUERY_SECONDS.observe(elapsed)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+        if stats.statements is not None:
+            stats.statements[statement] += 1
+
+
+def instrument_engine(sync_engine: Engine):
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+for _engine in (engine, *replicas.engines):
+    instrument_engine(_engine.sync_engine)
+
+
+def route_label(scope) -> str:
+    """Шаблон маршрута запроса с префиксами роутеров, например /users/cookie_auth/login."""
+    # FastAPI подключает роутеры лениво: в scope["route"] исходный маршрут вложенного
+    # роутера без префиксов, а полный шаблон - у effective_route_context
+    route = scope.get("fastapi", {}).get("effective_route_context") or scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    return "unmatched" if path_format is None else path_format
+
+
+class MetricsMiddleware:
+    """ASGI middleware: число запросов, латентность и работа с БД по шаблону маршрута.
+
+    Метка route - шаблон пути (/course/{course_id}/next), а не сам путь,
+    чтобы число временных рядов не росло вместе с числом id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_db_stats.reset(token)
+            route = route_label(scope)
+            method = scope["method"]
+            REQUEST_COUNT.labels(method, route, str(status_code)).inc()
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            REQUEST_DB_QUERIES.labels(method, route).observe(stats.queries)
+            REQUEST_DB_SECONDS.labels(method, route).observe(stats.seconds)
@@ -0,0 +1,108 @@
+from fastapi import HTTPException
+from sqlalchemy import Boolean, Integer, literal, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Step, UserCourseProgress
+from app.utils.course_outline import get_outline, invalidate_outline
+
+# сколько раз повторяем переход, если прогресс успели сдвинуть параллельным запросом
+MAX_ATTEMPTS = 3
+
+STEP_COLUMNS = (
+    Step.id,
+    Step.title,
+    Step.text_content,
+    Step.image_url,
+    Step.video_url,
+    Step.course_id,
+    Step.is_end,
+)
+
+
+def _move_statement(user_id: int, course_id: int, progress: Row, neighbour_id: int, forward: bool):
+    # Соседа уже нашли по оглавлению, здесь только compare-and-set: строка
+    # прогресса обновится, если её не изменили с момента чтения. Иначе
+    # ничего не обновится, и переход повторится по свежему состоянию.
+    statement = (
+        update(UserCourseProgress)
+        .where(
+            UserCourseProgress.user_id == user_id,
+            UserCourseProgress.course_id == course_id,
+            UserCourseProgress.current_step_id == progress.current_step_id,
+            UserCourseProgress.is_completed == progress.is_completed,
+            Step.id == neighbour_id,
+            Step.course_id == UserCourseProgress.course_id,
+        )
+        .returning(
+            *STEP_COLUMNS,
+            UserCourseProgress.is_completed.label("progress_completed"),
+            literal(progress.current_step_id, Integer).label("previous_step_id"),
+            literal(progress.is_completed, Boolean).label("was_completed"),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if not forward:
+        return statement.values(current_step_id=Step.id)
+    return statement.values(
+        current_step_id=Step.id,
+        is_completed=or_(UserCourseProgress.is_completed, Step.is_end),
+    )
+
+
+async def _load_progress(session: AsyncSession, user_id: int, course_id: int) -> Row:
+    progress = (await session.execute(
+        select(UserCourseProgress.current_step_id, UserCourseProgress.is_completed)
+        .filter_by(user_id=user_id, course_id=course_id)
+    )).first()
+    if not progress or progress.current_step_id is None:
+        raise HTTPException(404, "User progress or step not found")
+    return progress
+
+
+async def _move(session: AsyncSession, user_id: int, course_id: int, forward: bool) -> Row | Step:
+    for _ in range(MAX_ATTEMPTS):
+        outline = await get_outline(session, course_id)
+        progress = await _load_progress(session, user_id, course_id)
+        current = outline.step(progress.current_step_id)
+        if current is None:
+            # шага нет в оглавлении - значит оно устарело
+            invalidate_outline(course_id)
+            continue
+        neighbour = outline.next_step(current.id) if forward else outline.prev_step(current.id)
+        if neighbour is None:
+            if forward:
+                if progress.is_completed:
+                    raise HTTPException(409, "Course is already completed")
+                raise HTTPException(status_code=404, detail="Next step not found")
+            if current.order == 1:
+                step = await session.get(Step, current.id)
+                if step:
+                    return step
+            raise HTTPException(status_code=404, detail="Step back, not found")
+
+        row = (await session.execute(
+            _move_statement(user_id, course_id, progress, neighbour.id, forward)
+        )).first()
+        if row is not None:
+            return row
+        # прогресс сдвинули параллельно или шага-соседа уже нет в таблице
+        invalidate_outline(course_id)
+    raise HTTPException(409, "Progress was changed concurrently, try again")
+
+
+async def move_to_next_step(session: AsyncSession, user_id: int, course_id: int) -> Row:
+    """Переводит пользователя на следующий шаг, возвращает строку шага,
+    progress_completed, was_completed (значение до перехода) и previous_step_id.
+
+    Коммит остаётся за вызывающим кодом.
+    """
+    return await _move(session, user_id, course_id, forward=True)
+
+
+async def move_to_previous_step(session: AsyncSession, user_id: int, course_id: int) -> Row | Step:
+    """Переводит пользователя на предыдущий шаг, возвращает строку шага и previous_step_id.
+
+    На первом шаге возвращает текущий шаг (Step) без перехода.
+    """
+    return await _move(session, user_id, course_id, forward=False)
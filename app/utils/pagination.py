@@ -0,0 +1,41 @@
+import base64
+import json
+from typing import Annotated
+
+from fastapi import HTTPException, Query, status
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+limitQuery = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
+afterQuery = Annotated[str | None, Query(description="next_cursor из предыдущей страницы")]
+
+
+def encode_cursor(*values) -> str:
+    """Непрозрачный курсор из значений ключа сортировки последней строки страницы."""
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[int]:
+    """Значения ключа из курсора; все ключи сортировки у нас целые числа."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        values = None
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(type(value) is int for value in values)
+    ):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def next_cursor(rows: list, limit: int, key) -> str | None:
+    """Обрезает выборку limit + 1 до limit строк; курсор есть, только если строки ещё остались."""
+    if len(rows) <= limit:
+        return None
+    del rows[limit:]
+    return encode_cursor(*key(rows[-1]))
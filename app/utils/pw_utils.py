@@ -1,4 +1,13 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
 import bcrypt
+from fastapi import HTTPException, status
+
+from app.config import hash_settings
+from app.utils.metrics import PASSWORD_HASH_SECONDS
+
 
 def hash_pw(password: str, rounds: int = 12) -> str:
     byte_password = str.encode(password)
@@ -9,3 +18,86 @@ def hash_pw(password: str, rounds: int = 12) -> str:
 def check_pw(password: str, hashed_pw: str) -> bool:
     byte_password = str.encode(password)
     return bcrypt.checkpw(password=byte_password, hashed_password=hashed_pw.encode("utf-8"))
+
+
+class PasswordHasher:
+    """Выполняет bcrypt вне цикла событий в ограниченном пуле.
+
+    Одновременно идёт не больше ``workers`` хэширований, ещё до ``max_queue``
+    ждут свободного воркера, всё сверх этого отклоняется с 503.
+    """
+
+    def __init__(self, workers: int, max_queue: int, executor: str = "thread"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor_kind = executor
+        self._executor: Executor | None = None
+        self._semaphore = asyncio.Semaphore(workers)
+        self.queued = 0
+        self.in_progress = 0
+        self.rejected = 0
+        self.hash_count = 0
+        self.hash_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="pw-hash"
+                )
+        return self._executor
+
+    async def _run(self, operation: str, func, *args):
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.in_progress += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            PASSWORD_HASH_SECONDS.labels(operation).observe(elapsed)
+            self.hash_seconds += elapsed
+            self.hash_count += 1
+            self.in_progress -= 1
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_pw, password)
+
+    async def check(self, password: str, hashed_pw: str) -> bool:
+        return await self._run("check", check_pw, password, hashed_pw)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queued,
+            "in_progress": self.in_progress,
+            "rejected": self.rejected,
+            "hash_count": self.hash_count,
+            "hash_seconds_total": self.hash_seconds,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=hash_settings.HASH_WORKERS,
+    max_queue=hash_settings.HASH_MAX_QUEUE,
+    executor=hash_settings.HASH_EXECUTOR,
+)
@@ -0,0 +1,95 @@
+"""Запросы для GET-маршрутов: только нужные колонки, без ORM-объектов.
+
+Строки Row - обычные кортежи с доступом по имени: нет identity map,
+отслеживания изменений и лишних колонок вроде hashed_password. Имена
+колонок совпадают с ключами ответа, поэтому row._asdict() сразу готов
+к сериализации.
+"""
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Course, Step, User, UserCourseProgress
+from app.utils.pagination import decode_cursor, next_cursor
+
+COURSE_COLUMNS = (Course.id, Course.title, Course.description)
+STEP_LIST_COLUMNS = (
+    Step.title,
+    Step.image_url.label("step_image"),
+    Step.text_content,
+    Step.video_url,
+    Step.order,
+    Step.is_end,
+)
+# оглавление курса для боковой панели: без текста и медиа
+STEP_OUTLINE_COLUMNS = (Step.id, Step.title, Step.order, Step.is_end)
+STEP_COLUMNS = (
+    Step.id,
+    Step.title,
+    Step.text_content,
+    Step.image_url,
+    Step.video_url,
+    Step.course_id,
+    Step.is_end,
+)
+USER_COLUMNS = (User.id, User.first_name, User.last_name, User.username)
+
+
+async def active_courses(session: AsyncSession, limit: int, after: str | None) -> tuple[list[Row], str | None]:
+    query = select(*COURSE_COLUMNS).where(Course.is_active == True).order_by(Course.id).limit(limit + 1)
+    if after:
+        (after_id,) = decode_cursor(after, 1)
+        query = query.where(Course.id > after_id)
+    rows = (await session.execute(query)).all()
+    return rows, next_cursor(rows, limit, key=lambda row: (row.id,))
+
+
+async def active_course(session: AsyncSession, course_id: int) -> Row | None:
+    return (await session.execute(
+        select(*COURSE_COLUMNS).where(Course.is_active == True, Course.id == course_id)
+    )).first()
+
+
+async def course_steps(
+    session: AsyncSession,
+    course_id: int,
+    limit: int,
+    after: str | None,
+    columns: tuple = STEP_LIST_COLUMNS,
+) -> tuple[list[Row], str | None]:
+    query = select(*columns).where(Step.course_id == course_id).order_by(Step.order).limit(limit + 1)
+    if after:
+        (after_order,) = decode_cursor(after, 1)
+        query = query.where(Step.order > after_order)
+    rows = (await session.execute(query)).all()
+    return rows, next_cursor(rows, limit, key=lambda row: (row.order,))
+
+
+async def course_step(session: AsyncSession, course_id: int, step_id: int) -> Row | None:
+    return (await session.execute(
+        select(*STEP_COLUMNS).where(Step.course_id == course_id, Step.id == step_id)
+    )).first()
+
+
+async def user_courses(session: AsyncSession, user_id: int) -> list[Row]:
+    return (await session.execute(
+        select(*COURSE_COLUMNS, UserCourseProgress.is_completed)
+        .join(Course, Course.id == UserCourseProgress.course_id)
+        .where(UserCourseProgress.user_id == user_id)
+    )).all()
+
+
+async def user_progress(session: AsyncSession, user_id: int, course_id: int) -> Row | None:
+    return (await session.execute(
+        select(UserCourseProgress.user_id, UserCourseProgress.course_id, UserCourseProgress.current_step_id)
+        .where(UserCourseProgress.user_id == user_id, UserCourseProgress.course_id == course_id)
+    )).first()
+
+
+async def active_users(session: AsyncSession, limit: int, after: str | None) -> tuple[list[Row], str | None]:
+    query = select(*USER_COLUMNS).where(User.is_active == True).order_by(User.id).limit(limit + 1)
+    if after:
+        (after_id,) = decode_cursor(after, 1)
+        query = query.where(User.id > after_id)
+    rows = (await session.execute(query)).all()
+    return rows, next_cursor(rows, limit, key=lambda row: (row.id,))
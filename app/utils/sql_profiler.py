@@ -0,0 +1,108 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.backend.db import engine
+from app.config import sql_profiler_settings
+from app.utils.metrics import RequestDbStats, request_db_stats, route_label
+
+logger = logging.getLogger(__name__)
+
+
+class SqlProfilerMiddleware:
+    """Отладочный профайлер SQL по запросам: Server-Timing, бюджет запросов и поиск N+1.
+
+    Одинаковый текст запроса, выполненный несколько раз за один HTTP запрос, -
+    обычно ленивая загрузка в цикле. SQLAlchemy подставляет параметры отдельно,
+    поэтому текст запроса и есть его форма.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # под MetricsMiddleware счётчики запроса уже есть, дополняем их
+        stats = request_db_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestDbStats()
+            token = request_db_stats.set(stats)
+        stats.statements = Counter()
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - started) * 1000
+                timing = (
+                    f'db;dur={stats.seconds * 1000:.1f};desc="{stats.queries} queries", '
+                    f"app;dur={app_ms:.1f}"
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                request_db_stats.reset(token)
+            self._check(scope, stats)
+
+    def _check(self, scope, stats: RequestDbStats):
+        route = route_label(scope)
+        budget = sql_profiler_settings.SQL_QUERY_BUDGETS.get(route, sql_profiler_settings.SQL_QUERY_BUDGET)
+        if stats.queries > budget:
+            logger.warning(
+                "%s %s ran %d SQL statements (budget %d) in %.1f ms",
+                scope["method"], route, stats.queries, budget, stats.seconds * 1000,
+            )
+        for statement, count in stats.statements.most_common():
+            if count < sql_profiler_settings.SQL_REPEATED_STATEMENT_THRESHOLD:
+                break
+            logger.warning(
+                "%s %s ran the same statement %d times, possible N+1: %s",
+                scope["method"], route, count, " ".join(statement.split())[:300],
+            )
+
+
+@dataclass
+class QueryLog:
+    statements: list[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(*engines: AsyncEngine):
+    """Собирает все SQL запросы движков (по умолчанию primary) внутри блока.
+
+    Слушает события движка, а не контекст запроса, поэтому видит и запросы
+    приложения, запущенного TestClient в другом потоке:
+
+        with count_queries() as log:
+            client.get("/users/my_courses")
+        assert log.count == 2, log.statements
+    """
+    log = QueryLog()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        log.statements.append(statement)
+
+    targets = [target.sync_engine for target in engines or (engine,)]
+    for target in targets:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield log
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", record)
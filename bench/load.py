@@ -0,0 +1,235 @@
+"""Нагрузочный тест: виртуальные пользователи логинятся, листают шаги курса и каталог.
+
+    python -m bench.seed --courses 20 --steps 50 --users 1000
+    python -m bench.load --base-url http://127.0.0.1:8000 --users 50 --duration 30 \\
+        --output bench/results/current.json --baseline bench/results/baseline.json
+
+Без --base-url приложение запускается в этом же процессе через ASGI транспорт
+httpx - это удобно для сравнения коммитов, но нагрузка и сервер делят одно ядро.
+Результат - JSON с RPS и p50/p95/p99 по каждому маршруту; с --baseline
+печатается изменение относительно прошлого прогона.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from bench.seed import COURSE_PREFIX, PASSWORD, username
+
+# доли операций в цикле пользователя, кроме логина и старта курса
+DEFAULT_MIX = {"next": 0.7, "catalog": 0.2, "steps": 0.1}
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    def record(self, route: str, seconds: float, ok: bool):
+        self.latencies[route].append(seconds)
+        if not ok:
+            self.errors[route] += 1
+
+    def report(self, duration: float) -> dict:
+        routes = {}
+        for route, samples in sorted(self.latencies.items()):
+            routes[route] = _summary(samples, self.errors[route], duration)
+        everything = [sample for samples in self.latencies.values() for sample in samples]
+        return {"routes": routes, "total": _summary(everything, sum(self.errors.values()), duration)}
+
+
+def _summary(samples: list[float], errors: int, duration: float) -> dict:
+    if not samples:
+        return {"count": 0, "errors": errors, "rps": 0}
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))] * 1000
+
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / duration, 1),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2),
+        "p50_ms": round(percentile(50), 2),
+        "p95_ms": round(percentile(95), 2),
+        "p99_ms": round(percentile(99), 2),
+    }
+
+
+async def _call(client: httpx.AsyncClient, recorder: Recorder, route: str, method: str, url: str, **kwargs):
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        recorder.record(route, time.perf_counter() - started, ok=False)
+        return None
+    # 404/409 на next - нормальный конец курса, это не ошибка сервера
+    recorder.record(route, time.perf_counter() - started, ok=response.status_code < 500)
+    return response
+
+
+async def _login(client: httpx.AsyncClient, recorder: Recorder, user_index: int) -> bool:
+    response = await _call(
+        client, recorder, "POST /users/cookie_auth/login", "POST", "/users/cookie_auth/login",
+        data={"username": username(user_index), "password": PASSWORD},
+    )
+    if response is None or response.status_code != 201:
+        return False
+    # cookie выставляются с secure, поэтому передаём их заголовком и по http
+    client.headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in response.cookies.items())
+    return True
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    user_index: int,
+    course_ids: list[int],
+    mix: dict[str, float],
+    deadline: float,
+    relogin_every: int,
+):
+    rng = random.Random(user_index)
+    if not await _login(client, recorder, user_index):
+        return
+    course_id = rng.choice(course_ids)
+    await _call(client, recorder, "POST /course/start/{course_id}", "POST", f"/course/start/{course_id}")
+    operations, weights = zip(*mix.items())
+    done = 0
+    while time.perf_counter() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        if operation == "next":
+            response = await _call(client, recorder, "GET /course/{course_id}/next", "GET", f"/course/{course_id}/next")
+            if response is not None and response.status_code in (404, 409):
+                # курс пройден - начинаем заново
+                await _call(client, recorder, "DELETE /course/reset/{course_id}", "DELETE", f"/course/reset/{course_id}")
+                await _call(client, recorder, "POST /course/start/{course_id}", "POST", f"/course/start/{course_id}")
+        elif operation == "catalog":
+            await _call(client, recorder, "GET /course/", "GET", "/course/", params={"limit": 50})
+        elif operation == "steps":
+            await _call(client, recorder, "GET /steps/{course_id}", "GET", f"/steps/{course_id}")
+        done += 1
+        if relogin_every and done % relogin_every == 0:
+            await _login(client, recorder, user_index)
+
+
+@asynccontextmanager
+async def _client_factory(base_url: str | None):
+    if base_url:
+        yield lambda: httpx.AsyncClient(base_url=base_url, timeout=30)
+        return
+    from app.main import app, lifespan
+
+    transport = httpx.ASGITransport(app=app)
+    async with lifespan(app):
+        yield lambda: httpx.AsyncClient(transport=transport, base_url="https://bench", timeout=30)
+
+
+async def _course_ids(client: httpx.AsyncClient) -> list[int]:
+    response = await client.get("/course/", params={"limit": 500})
+    response.raise_for_status()
+    return [course["id"] for course in response.json()["courses"] if course["title"].startswith(COURSE_PREFIX)]
+
+
+async def run(args) -> dict:
+    mix = json.loads(args.mix) if args.mix else DEFAULT_MIX
+    recorder = Recorder()
+    async with _client_factory(args.base_url) as make_client:
+        async with make_client() as client:
+            course_ids = await _course_ids(client)
+        if not course_ids:
+            raise SystemExit("No benchmark courses found, run python -m bench.seed first")
+        clients = [make_client() for _ in range(args.users)]
+        started = time.perf_counter()
+        deadline = started + args.duration
+        try:
+            await asyncio.gather(*(
+                virtual_user(client, recorder, index, course_ids, mix, deadline, args.relogin_every)
+                for index, client in enumerate(clients)
+            ))
+        finally:
+            for client in clients:
+                await client.aclose()
+        elapsed = time.perf_counter() - started
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "base_url": args.base_url or "in-process",
+            "users": args.users,
+            "duration_s": round(elapsed, 2),
+            "mix": mix,
+            "relogin_every": args.relogin_every,
+        },
+        **recorder.report(elapsed),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _change(current: float, baseline: float) -> str:
+    if not baseline:
+        return "n/a"
+    return f"{(current - baseline) / baseline * 100:+.1f}%"
+
+
+def print_report(result: dict, baseline: dict | None):
+    header = f"{'route':40} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}"
+    if baseline:
+        header += f" {'rps chg':>9} {'p95 chg':>9}"
+    print(header)
+    rows = {**result["routes"], "TOTAL": result["total"]}
+    for route, stats in rows.items():
+        if not stats["count"]:
+            continue
+        line = (
+            f"{route:40} {stats['count']:>7} {stats['errors']:>5} {stats['rps']:>8} "
+            f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}"
+        )
+        if baseline:
+            base = baseline["total"] if route == "TOTAL" else baseline["routes"].get(route)
+            if base and base.get("count"):
+                line += f" {_change(stats['rps'], base['rps']):>9} {_change(stats['p95_ms'], base['p95_ms']):>9}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="адрес запущенного сервера; без него - приложение в процессе")
+    parser.add_argument("--users", type=int, default=20, help="число виртуальных пользователей")
+    parser.add_argument("--duration", type=float, default=30, help="секунд нагрузки")
+    parser.add_argument("--mix", help='доли операций, JSON: {"next": 0.7, "catalog": 0.2, "steps": 0.1}')
+    parser.add_argument("--relogin-every", type=int, default=0, help="повторный логин каждые N операций")
+    parser.add_argument("--output", type=Path, help="куда сохранить JSON с результатом")
+    parser.add_argument("--baseline", type=Path, help="JSON прошлого прогона для сравнения")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print_report(result, baseline)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
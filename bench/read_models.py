@@ -0,0 +1,87 @@
+"""Сравнение ORM-выборок с колоночными Core-запросами из app.utils.read_models.
+
+    python -m bench.seed --courses 5 --steps 500 --users 2000
+    python -m bench.read_models --repeat 50
+
+Для каждого запроса печатает среднее время и пик памяти Python (tracemalloc)
+на один вызов - примерно столько же тратит обработчик GET-запроса.
+Нужна база, заполненная bench.seed.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.backend.db import engine, session_maker
+from app.models import Course, Step, User
+from app.utils import read_models
+from app.utils.pagination import MAX_PAGE_SIZE
+from bench.seed import COURSE_PREFIX
+
+
+async def orm_steps(session: AsyncSession, course_id: int):
+    return (await session.scalars(
+        select(Step).where(Step.course_id == course_id).order_by(Step.order).limit(MAX_PAGE_SIZE + 1)
+    )).all()
+
+
+async def core_steps(session: AsyncSession, course_id: int):
+    return await read_models.course_steps(session, course_id, MAX_PAGE_SIZE, None)
+
+
+async def orm_users(session: AsyncSession, course_id: int):
+    return (await session.scalars(
+        select(User).where(User.is_active == True).order_by(User.id).limit(MAX_PAGE_SIZE + 1)
+    )).all()
+
+
+async def core_users(session: AsyncSession, course_id: int):
+    return await read_models.active_users(session, MAX_PAGE_SIZE, None)
+
+
+async def measure(func, course_id: int, repeat: int) -> tuple[float, float]:
+    elapsed = 0.0
+    peak = 0
+    for _ in range(repeat):
+        # новая сессия на каждый вызов, как в обработчике запроса
+        async with session_maker() as session:
+            tracemalloc.start()
+            started = time.perf_counter()
+            await func(session, course_id)
+            elapsed += time.perf_counter() - started
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    return elapsed / repeat * 1000, peak / 1024
+
+
+async def run(repeat: int):
+    async with session_maker() as session:
+        course_id = await session.scalar(
+            select(Course.id).where(Course.title.startswith(COURSE_PREFIX)).order_by(Course.id)
+        )
+    if course_id is None:
+        raise SystemExit("No benchmark courses found, run python -m bench.seed first")
+    pairs = {"steps": (orm_steps, core_steps), "users": (orm_users, core_users)}
+    print(f"{'query':8} {'orm ms':>9} {'core ms':>9} {'orm KiB':>9} {'core KiB':>9}")
+    for name, (orm, core) in pairs.items():
+        # прогрев: соединения пула и кэш скомпилированных запросов
+        await measure(orm, course_id, 3)
+        await measure(core, course_id, 3)
+        orm_ms, orm_kib = await measure(orm, course_id, repeat)
+        core_ms, core_kib = await measure(core, course_id, repeat)
+        print(f"{name:8} {orm_ms:>9.2f} {core_ms:>9.2f} {orm_kib:>9.0f} {core_kib:>9.0f}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Заполняет базу данными для нагрузочного теста: N курсов по M шагов и K пользователей.
+
+    python -m bench.seed --courses 20 --steps 50 --users 1000
+
+Повторный запуск ничего не дублирует, но сбрасывает прогресс тестовых
+пользователей, чтобы каждый прогон начинался с одинакового состояния.
+Схему создаёт alembic upgrade head, сидер её не трогает.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.backend.db import engine, session_maker
+from app.models import Course, Step, User, UserCourseProgress
+from app.utils.course_stats import reconcile_course_stats
+from app.utils.pw_utils import hash_pw
+
+USERNAME_PREFIX = "bench-user-"
+COURSE_PREFIX = "bench-course-"
+PASSWORD = "bench-password"
+CHUNK_SIZE = 1000
+
+
+def course_title(index: int) -> str:
+    return f"{COURSE_PREFIX}{index}"
+
+
+def username(index: int) -> str:
+    return f"{USERNAME_PREFIX}{index}"
+
+
+async def _insert_chunks(session, model, rows: list[dict], **conflict):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        query = insert(model).values(rows[start:start + CHUNK_SIZE])
+        await session.execute(query.on_conflict_do_nothing(**conflict))
+
+
+async def seed(courses: int, steps: int, users: int):
+    started = time.perf_counter()
+    # bcrypt медленный, поэтому у всех пользователей один и тот же хэш
+    hashed_password = hash_pw(PASSWORD)
+    async with session_maker() as session:
+        await _insert_chunks(
+            session,
+            Course,
+            [
+                {"title": course_title(i), "description": "Benchmark course"}
+                for i in range(courses)
+            ],
+            index_elements=[Course.title],
+        )
+        course_ids = (await session.scalars(
+            select(Course.id).where(Course.title.startswith(COURSE_PREFIX)).order_by(Course.id)
+        )).all()
+        await _insert_chunks(
+            session,
+            Step,
+            [
+                {
+                    "course_id": course_id,
+                    "order": order,
+                    "title": f"b{course_id}-{order}",
+                    "text_content": "Benchmark step " * 20,
+                    "is_end": order == steps,
+                }
+                for course_id in course_ids[:courses]
+                for order in range(1, steps + 1)
+            ],
+            constraint="uq_steps_course_id_order",
+        )
+        await _insert_chunks(
+            session,
+            User,
+            [
+                {
+                    "first_name": "Bench",
+                    "last_name": "User",
+                    "username": username(i),
+                    "hashed_password": hashed_password,
+                }
+                for i in range(users)
+            ],
+            index_elements=[User.username],
+        )
+        bench_users = select(User.id).where(User.username.startswith(USERNAME_PREFIX))
+        await session.execute(delete(UserCourseProgress).where(UserCourseProgress.user_id.in_(bench_users)))
+        await session.commit()
+    async with session_maker() as session:
+        await reconcile_course_stats(session)
+    await engine.dispose()
+    print(
+        f"Seeded {courses} courses x {steps} steps and {users} users "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--steps", type=int, default=50)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(seed(args.courses, args.steps, args.users))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Микробенчмарк сериализации списка шагов: старый путь против быстрого.
+
+    python -m bench.serialization --rows 10 1000 100000
+
+old      - модель StepListItem на строку, затем jsonable_encoder и json.dumps,
+           как делал FastAPI для возвращённых моделей;
+adapter  - TypeAdapter(list[StepListItem]): проверка и dump_json целиком в Rust;
+fast     - словари из строк и pydantic_core.to_json (FastJSONResponse);
+orjson   - то же через orjson, если он установлен - для сравнения.
+"""
+import argparse
+import json
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.schemas import StepListItem
+from app.utils.serialization import dump_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+step_list_adapter = TypeAdapter(list[StepListItem])
+
+
+def make_rows(count: int) -> list[tuple]:
+    # (title, image_url, text_content, video_url, order, is_end), как строки выборки
+    return [
+        (f"Шаг {i}", None, "Текст шага. " * 20, f"https://video.example/{i}", i, i == count)
+        for i in range(1, count + 1)
+    ]
+
+
+def old_path(rows):
+    items = [
+        StepListItem(
+            title=title, step_image=image, text_content=text, video_url=video, order=order,
+            status="Закончен" if is_end else "Не закончен",
+        )
+        for title, image, text, video, order, is_end in rows
+    ]
+    content = jsonable_encoder({"status_code": 200, "course_id": 1, "steps": items})
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _dicts(rows):
+    return [
+        {
+            "title": title, "step_image": image, "text_content": text, "video_url": video,
+            "order": order, "status": "Закончен" if is_end else "Не закончен",
+        }
+        for title, image, text, video, order, is_end in rows
+    ]
+
+
+def adapter_path(rows):
+    steps = step_list_adapter.validate_python(_dicts(rows))
+    return b'{"status_code":200,"course_id":1,"steps":' + step_list_adapter.dump_json(steps) + b"}"
+
+
+def fast_path(rows):
+    return dump_json({"status_code": 200, "course_id": 1, "steps": _dicts(rows)})
+
+
+def orjson_path(rows):
+    return orjson.dumps({"status_code": 200, "course_id": 1, "steps": _dicts(rows)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 1000, 100_000])
+    parser.add_argument("--seconds", type=float, default=1, help="примерное время на каждый замер")
+    args = parser.parse_args()
+
+    paths = {"old": old_path, "adapter": adapter_path, "fast": fast_path}
+    if orjson is not None:
+        paths["orjson"] = orjson_path
+
+    print(f"{'rows':>8} " + " ".join(f"{name + ' ms':>12}" for name in paths) + f" {'speedup':>8}")
+    for count in args.rows:
+        rows = make_rows(count)
+        assert json.loads(old_path(rows)) == json.loads(fast_path(rows)) == json.loads(adapter_path(rows))
+        results = {}
+        for name, func in paths.items():
+            timer = timeit.Timer(lambda: func(rows))
+            number, _ = timer.autorange()
+            number = max(1, int(number * args.seconds / 0.2))
+            results[name] = min(timer.repeat(repeat=3, number=number)) / number * 1000
+        speedup = results["old"] / results["fast"]
+        print(f"{count:>8} " + " ".join(f"{ms:>12.3f}" for ms in results.values()) + f" {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Общие фикстуры тестов.
+
+Тесты с базой идут только при заданной TEST_DATABASE_NAME - отдельной базе
+на сервере из DATABASE_*. Её схема при запуске пересоздаётся миграциями,
+поэтому рабочую базу туда указывать нельзя. Без переменной такие тесты
+пропускаются.
+"""
+import asyncio
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+TEST_DATABASE_NAME = os.environ.get("TEST_DATABASE_NAME")
+if TEST_DATABASE_NAME:
+    os.environ["DATABASE_NAME"] = TEST_DATABASE_NAME
+# фоновые задачи lifespan ходят в базу сами и сбивали бы подсчёт запросов
+os.environ.setdefault("OUTBOX_ENABLED", "false")
+os.environ.setdefault("STATS_RECONCILE_INTERVAL_SECONDS", "0")
+os.environ.setdefault("DATABASE_REPLICA_URLS", "")
+
+import httpx
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text, update
+
+ROOT = Path(__file__).resolve().parent.parent
+PASSWORD = "test-password"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def migrated_database():
+    if not TEST_DATABASE_NAME:
+        pytest.skip("TEST_DATABASE_NAME is not set")
+    from app.backend.db import engine
+
+    async def recreate_schema():
+        async with engine.begin() as connection:
+            await connection.execute(text("DROP SCHEMA public CASCADE"))
+            await connection.execute(text("CREATE SCHEMA public"))
+        await engine.dispose()
+
+    asyncio.run(recreate_schema())
+    command.upgrade(Config(str(ROOT / "alembic.ini")), "head")
+
+
+@pytest.fixture
+async def db(migrated_database):
+    """Пустые таблицы и кэши процесса; сессия для подготовки данных."""
+    from app.backend import cache as shared_cache
+    from app.backend.db import Base, engine, session_maker
+    from app.utils.compression import precompressed
+    from app.utils.course_outline import outline_cache
+    from app.utils.jwt_token import revoked_tokens, verified_tokens
+
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    async with engine.begin() as connection:
+        await connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    if isinstance(shared_cache.cache.backend, shared_cache.MemoryCacheBackend):
+        shared_cache.cache.backend = shared_cache.MemoryCacheBackend(
+            maxsize=shared_cache.cache_settings.CACHE_MEMORY_MAX_SIZE
+        )
+    outline_cache.clear()
+    verified_tokens.clear()
+    revoked_tokens.clear()
+    precompressed.clear()
+
+    async with session_maker() as session:
+        yield session
+    # у каждого теста свой цикл событий, соединения пула к нему привязаны
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(db):
+    from app.main import app, lifespan
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        # cookie ставятся с secure, поэтому https
+        async with httpx.AsyncClient(transport=transport, base_url="https://test") as client:
+            yield client
+
+
+@pytest.fixture
+def login(client, db):
+    """Регистрирует пользователя и логинит его cookie в client."""
+    from app.models import User
+
+    async def login(username: str, admin: bool = False):
+        response = await client.post("/users/register", json={
+            "first_name": "Test", "last_name": "User", "username": username, "password": PASSWORD,
+        })
+        assert response.status_code == 201, response.text
+        if admin:
+            await db.execute(update(User).where(User.username == username).values(is_admin=True))
+            await db.commit()
+        response = await client.post("/users/cookie_auth/login", data={"username": username, "password": PASSWORD})
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return login
+
+
+@pytest.fixture
+def make_course(db):
+    """Курс с steps шагами; последний шаг - is_end."""
+    from app.models import Course, Step
+
+    async def make_course(title: str = "Course", steps: int = 3) -> Course:
+        course = Course(title=title, description="description")
+        db.add(course)
+        await db.flush()
+        for order in range(1, steps + 1):
+            db.add(Step(
+                title=f"{title[:20]}-{order}",
+                text_content=f"text {order}",
+                order=order,
+                course_id=course.id,
+                is_end=order == steps,
+            ))
+        await db.commit()
+        return course
+
+    return make_course
+
+
+@pytest.fixture
+def assert_queries(db):
+    """Точное число SQL запросов к primary в блоке; при расхождении печатает сами запросы.
+
+        with assert_queries(2):
+            await client.get("/users/my_courses")
+    """
+    from app.utils.sql_profiler import count_queries
+
+    @contextmanager
+    def assert_queries(expected: int):
+        with count_queries() as log:
+            yield log
+        assert log.count == expected, "\n".join(
+            [f"expected {expected} queries, ran {log.count}:", *log.statements]
+        )
+
+    return assert_queries
+
+
+@pytest.fixture
+def media_root(tmp_path, monkeypatch):
+    """Хранилище медиа во временном каталоге теста."""
+    from app.backend.media import media_storage
+
+    monkeypatch.setattr(media_storage, "root", tmp_path)
+    return tmp_path
@@ -0,0 +1,39 @@
+"""Админские маршруты создания курсов и шагов."""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def step(title: str, order: int) -> dict:
+    return {"title": title, "order": order, "text_content": "text"}
+
+
+@pytest.fixture
+async def admin(client, login):
+    await login("admin", admin=True)
+
+
+async def test_create_step(client, admin, make_course):
+    course = await make_course(steps=1)
+    response = await client.post(f"/admin/step-create/{course.id}", json=step("Second", 2))
+    assert response.status_code == 200, response.text
+    assert response.json()["step"]["title"] == "Second"
+
+
+async def test_create_step_duplicate_order(client, admin, make_course):
+    course = await make_course(steps=1)
+    response = await client.post(f"/admin/step-create/{course.id}", json=step("Another first", 1))
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Step with order 1 already exists in this course"
+
+
+async def test_create_step_duplicate_title(client, admin, make_course):
+    course = await make_course(title="Course", steps=1)
+    response = await client.post(f"/admin/step-create/{course.id}", json=step("Course-1", 2))
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Step title is already used by another step"
+
+
+async def test_create_step_unknown_course(client, admin):
+    response = await client.post("/admin/step-create/999", json=step("Orphan", 1))
+    assert response.status_code == 404
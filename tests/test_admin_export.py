@@ -0,0 +1,76 @@
+"""Потоковые выгрузки: курс обратно в импорт, пользователи в NDJSON и CSV."""
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy import update
+
+from app.models import Step, User
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def admin(client, login):
+    await login("admin", admin=True)
+
+
+def ndjson(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+async def test_course_export_reimports_unchanged(client, db, admin, make_course):
+    course = await make_course(title="Round trip", steps=4)
+    await db.execute(update(Step).where(Step.order == 2).values(image_url="/media/a", video_url="https://v"))
+    await db.commit()
+
+    exported = await client.get(f"/admin/export/course/{course.id}")
+    assert exported.status_code == 200
+    assert exported.headers["content-type"] == "application/x-ndjson"
+    header, *steps = ndjson(exported)
+    assert header["version"] == 1
+    assert [step["order"] for step in steps] == [1, 2, 3, 4]
+
+    response = await client.post(
+        "/admin/import/course/ndjson", content=exported.content,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["course_id"] == course.id
+    assert response.json()["version"] == 2
+
+    header_again, *steps_again = ndjson(await client.get(f"/admin/export/course/{course.id}"))
+    assert {**header, "version": 2} == header_again
+    assert steps_again == steps
+
+
+async def test_course_export_unknown_course(client, admin):
+    assert (await client.get("/admin/export/course/999")).status_code == 404
+
+
+async def test_users_export_formats_match(client, db, admin, make_course):
+    course = await make_course(steps=2)
+    for index in range(3):
+        db.add(User(first_name="User", last_name=str(index), username=f"user{index}", hashed_password="-"))
+    await db.commit()
+    await client.post(f"/course/start/{course.id}")
+
+    rows = ndjson(await client.get("/admin/export/users"))
+    # у пользователя без прогресса одна строка с course_id = 0
+    assert [(row["username"], row["course_id"]) for row in rows] == [
+        ("admin", course.id), ("user0", 0), ("user1", 0), ("user2", 0),
+    ]
+    assert rows[0]["current_step_id"] is not None
+
+    response = await client.get("/admin/export/users", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    as_csv = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["username"] for row in as_csv] == [row["username"] for row in rows]
+    assert [int(row["user_id"]) for row in as_csv] == [row["user_id"] for row in rows]
+
+    # продолжение с последней полученной строки отдаёт ровно хвост выгрузки
+    resumed = ndjson(await client.get(
+        "/admin/export/users", params={"after_user_id": rows[1]["user_id"], "after_course_id": 0},
+    ))
+    assert resumed == rows[2:]
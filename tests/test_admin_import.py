@@ -0,0 +1,63 @@
+"""Импорт курса: обмен названиями шагов и NDJSON потоком."""
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Step
+
+pytestmark = pytest.mark.anyio
+
+
+def _course(*titles: str, version: int | None = None) -> dict:
+    return {
+        "title": "Imported",
+        "description": "description",
+        "version": version,
+        "steps": [
+            {"title": title, "text_content": title, "order": order, "is_end": order == len(titles)}
+            for order, title in enumerate(titles, start=1)
+        ],
+    }
+
+
+async def _titles(db) -> list[str]:
+    db.expire_all()
+    return list(await db.scalars(select(Step.title).where(Step.is_active).order_by(Step.order)))
+
+
+async def test_swap_step_titles(client, db, login):
+    await login("admin", admin=True)
+    response = await client.post("/admin/import/course", json=_course("first", "second", "third"))
+    assert response.status_code == 200, response.text
+
+    response = await client.post("/admin/import/course", json=_course("second", "first", version=1))
+    assert response.status_code == 200, response.text
+    assert await _titles(db) == ["second", "first"]
+
+
+async def test_title_of_other_course(client, db, login, make_course):
+    await login("admin", admin=True)
+    await make_course(title="Other", steps=2)
+    response = await client.post("/admin/import/course", json=_course("new", "Other-2"))
+    assert response.status_code == 409
+    assert "Other-2" in response.json()["detail"]
+
+
+async def test_ndjson_in_small_chunks(client, db, login):
+    await login("admin", admin=True)
+    course = _course(*(f"step {order}" for order in range(1, 51)))
+    lines = [json.dumps({key: value for key, value in course.items() if key != "steps"})]
+    lines += [json.dumps(step) for step in course["steps"]]
+    body = ("\n".join(lines) + "\n").encode()
+
+    async def chunks():
+        for start in range(0, len(body), 7):
+            yield body[start:start + 7]
+
+    response = await client.post(
+        "/admin/import/course/ndjson", content=chunks(), headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200, response.text
+    assert len(response.json()["steps"]) == 50
+    assert await _titles(db) == [f"step {order}" for order in range(1, 51)]
@@ -0,0 +1,130 @@
+"""Зависимости авторизации: пользователь из кэша, claims и БД."""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import inspect, select, update
+
+from app.config import settings
+from app.models import User
+from app.utils.current_user import (
+    Principal,
+    get_current_db_user,
+    invalidate_user,
+    load_active_user,
+    principal_from_payload,
+    user_cache,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_db_user_reloads_cached_user(client, db, login):
+    await login("student")
+    user_id = await db.scalar(select(User.id).where(User.username == "student"))
+    db.expunge_all()
+    await load_active_user(db, user_id)
+    cached = await load_active_user(db, user_id)
+    assert inspect(cached).transient
+
+    user = await get_current_db_user(session=db, user=cached)
+    assert inspect(user).persistent
+    assert user.id == user_id
+    # полная строка, а не публичные поля из кэша
+    assert user.hashed_password
+
+
+@pytest.fixture
+def stateless(monkeypatch):
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+
+
+def access_payload(**claims) -> dict:
+    payload = {
+        "type": "access_token", "sub": "7", "username": "student",
+        "first_name": "Test", "last_name": "User", "is_active": True, "is_admin": False,
+    }
+    payload.update(claims)
+    return payload
+
+
+def test_principal_from_claims():
+    principal = principal_from_payload(access_payload(is_admin=True))
+    assert principal == Principal(
+        id=7, username="student", first_name="Test", last_name="User", is_active=True, is_admin=True,
+    )
+
+
+def test_principal_needs_all_claims():
+    payload = access_payload()
+    del payload["is_admin"]
+    assert principal_from_payload(payload) is None
+    assert principal_from_payload(access_payload(type="refresh_token")) is None
+
+
+def test_inactive_principal_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        principal_from_payload(access_payload(is_active=False))
+    assert error.value.status_code == 401
+
+
+async def test_stateless_user_from_claims(client, db, login, stateless, assert_queries):
+    await login("student")
+    user_id = await db.scalar(select(User.id).where(User.username == "student"))
+    await invalidate_user(user_id)
+    # ни кэша, ни запроса в БД: пользователь собирается из токена
+    with assert_queries(0):
+        response = await client.get("/users/cookie_auth/me")
+    assert response.status_code == 200
+    assert response.json()["username"] == "student"
+
+
+async def test_admin_check_reads_claim(client, db, login, stateless, assert_queries):
+    await login("admin", admin=True)
+    with assert_queries(0):
+        assert (await client.get("/admin/stats/db-pool")).status_code == 200
+    # флаг в БД снят, но до истечения токена решает claim
+    await db.execute(update(User).where(User.username == "admin").values(is_admin=False))
+    await db.commit()
+    assert (await client.get("/admin/stats/db-pool")).status_code == 200
+
+    await login("student")
+    with assert_queries(0):
+        assert (await client.get("/admin/stats/db-pool")).status_code == 403
+
+
+@pytest.mark.parametrize("stateless_auth", [False, True])
+async def test_revoked_access_token(client, login, monkeypatch, stateless_auth):
+    monkeypatch.setattr(settings, "STATELESS_AUTH", stateless_auth)
+    await login("student")
+    token = client.cookies["access_token"]
+    assert (await client.get("/users/cookie_auth/logout")).status_code == 200
+
+    client.cookies.set("access_token", token)
+    response = await client.get("/users/cookie_auth/me")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+
+async def test_logout_revokes_refresh_token(client, login):
+    await login("student")
+    refresh_token = client.cookies["refresh_token"]
+    assert (await client.post("/users/cookie_auth/refresh")).status_code == 200
+    assert (await client.get("/users/cookie_auth/logout")).status_code == 200
+
+    client.cookies.set("refresh_token", refresh_token)
+    response = await client.post("/users/cookie_auth/refresh")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+
+async def test_user_cache_counters(client, db, login):
+    await login("student")
+    user_id = await db.scalar(select(User.id).where(User.username == "student"))
+    await invalidate_user(user_id)
+    before = user_cache.stats()
+    await load_active_user(db, user_id)
+    await load_active_user(db, user_id)
+    assert user_cache.stats() == {"hits": before["hits"] + 1, "misses": before["misses"] + 1}
+
+    await login("admin", admin=True)
+    response = await client.get("/metrics")
+    assert 'cache_hits_total{cache="user"}' in response.text
@@ -0,0 +1,130 @@
+"""Общий кэш на Redis; вместо сервера - fakeredis."""
+import asyncio
+
+import pytest
+
+from app.backend.cache import Cache, MemoryCacheBackend, RedisCacheBackend
+from app.config import cache_settings
+
+fakeredis = pytest.importorskip("fakeredis")
+
+pytestmark = pytest.mark.anyio
+
+URL = "redis://cache-test:6379/0"
+CHANNEL = "test:invalidate"
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """Все клиенты теста ходят в один и тот же свежий fakeredis."""
+    server = fakeredis.FakeServer()
+
+    def from_url(url, **kwargs):
+        return fakeredis.FakeAsyncRedis.from_url(url, server=server, **kwargs)
+
+    monkeypatch.setattr("redis.asyncio.from_url", from_url)
+    return server
+
+
+@pytest.fixture
+async def make_cache(redis_server):
+    caches = []
+
+    def make_cache() -> Cache:
+        cache = Cache(RedisCacheBackend(URL, CHANNEL), prefix="test")
+        caches.append(cache)
+        return cache
+
+    yield make_cache
+    for cache in caches:
+        await cache.close()
+
+
+async def test_get_set_and_ttl(make_cache):
+    cache = make_cache()
+    key = cache.key("value")
+    assert await cache.get(key) is None
+    await cache.set(key, {"a": [1, 2]}, ttl=0.2)
+    assert await cache.get(key) == {"a": [1, 2]}
+    assert 0 < await cache.backend._redis.pttl(key) <= 200
+    await asyncio.sleep(0.3)
+    assert await cache.get(key) is None
+
+
+async def test_get_or_load_stores_value(make_cache):
+    cache = make_cache()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return "loaded"
+
+    assert await cache.get_or_load(cache.key("lazy"), load, ttl=60) == "loaded"
+    assert await cache.get_or_load(cache.key("lazy"), load, ttl=60) == "loaded"
+    assert len(calls) == 1
+
+
+async def test_invalidate_tags(make_cache):
+    cache = make_cache()
+    await cache.set(cache.key("a"), 1, ttl=60, tags=["course:1"])
+    await cache.set(cache.key("b"), 2, ttl=60, tags=["course:1", "listing"])
+    await cache.set(cache.key("c"), 3, ttl=60, tags=["course:2"])
+
+    await cache.invalidate_tags("course:1")
+
+    assert await cache.get(cache.key("a")) is None
+    assert await cache.get(cache.key("b")) is None
+    assert await cache.get(cache.key("c")) == 3
+    # множество ключей тега удалено вместе с ключами
+    assert not await cache.backend._redis.exists(cache.key("tag", "course:1") + ":keys")
+
+
+async def test_invalidation_reaches_other_instance(make_cache):
+    writer, reader = make_cache(), make_cache()
+    received = asyncio.Queue()
+    reader.on_invalidate(received.put_nowait)
+    await writer.start()
+    await reader.start()
+
+    await writer.set(writer.key("shared"), "value", ttl=60, tags=["course:7"])
+    assert await reader.get(reader.key("shared")) == "value"
+    await writer.invalidate_tags("course:7")
+
+    assert await asyncio.wait_for(received.get(), timeout=2) == ["course:7"]
+    assert await reader.get(reader.key("shared")) is None
+
+
+async def test_listener_reconnects(make_cache, redis_server, monkeypatch):
+    monkeypatch.setattr(cache_settings, "CACHE_RECONNECT_MIN_SECONDS", 0.01)
+    writer, reader = make_cache(), make_cache()
+    received = asyncio.Queue()
+    reader.on_invalidate(received.put_nowait)
+    await reader.start()
+
+    # Redis пропал: подписка рвётся, переподключения сначала тоже падают
+    redis_server.connected = False
+    await asyncio.sleep(0.1)
+    redis_server.connected = True
+
+    async def invalidate_until_received():
+        while received.empty():
+            await writer.invalidate_tags("course:1")
+            await asyncio.sleep(0.05)
+
+    await asyncio.wait_for(invalidate_until_received(), timeout=5)
+    assert await received.get() == ["course:1"]
+
+
+async def test_memory_tags_follow_evicted_keys():
+    backend = MemoryCacheBackend(maxsize=10)
+    for index in range(100):
+        await backend.set(f"key:{index}", b"value", ttl=60, tags=[f"tag:{index}", "all"])
+    assert len(backend._tags) == 11
+    assert backend._tags["all"] == {f"key:{index}" for index in range(90, 100)}
+
+    await backend.delete("key:99")
+    await backend.set("key:98", b"value", ttl=60)
+    assert "tag:99" not in backend._tags and "tag:98" not in backend._tags
+    assert len(backend._tags["all"]) == 8
+    await backend.invalidate_tags(["all"])
+    assert backend._tags == {} and backend._key_tags == {}
@@ -0,0 +1,53 @@
+"""CompressionMiddleware на уровне ASGI сообщений."""
+import pytest
+
+from app.utils.compression import CompressionMiddleware
+
+pytestmark = pytest.mark.anyio
+
+
+def _scope(accept_encoding: str = "gzip") -> dict:
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+
+
+async def _run(messages: list[dict]) -> list[dict]:
+    async def app(scope, receive, send):
+        for message in messages:
+            await send(message)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await CompressionMiddleware(app)(_scope(), None, send)
+    return sent
+
+
+async def test_pathsend_gets_held_headers():
+    start = {
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/plain"), (b"content-length", b"4096")],
+    }
+    sent = await _run([start, {"type": "http.response.pathsend", "path": "/tmp/file.txt"}])
+    assert [message["type"] for message in sent] == ["http.response.start", "http.response.pathsend"]
+    assert b"content-encoding" not in dict(sent[0]["headers"])
+
+
+async def test_large_body_is_compressed():
+    body = b"x" * 4096
+    start = {
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    }
+    sent = await _run([start, {"type": "http.response.body", "body": body}])
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert int(headers[b"content-length"]) == len(sent[1]["body"]) < len(body)
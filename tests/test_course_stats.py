@@ -0,0 +1,56 @@
+"""Сверка счётчиков курсов с прогрессом."""
+import asyncio
+
+import pytest
+from sqlalchemy import select, text, update
+
+from app.backend.db import session_maker
+from app.models import CourseStat, StepStat
+from app.utils.course_stats import get_course_stats, reconcile_course_stats
+
+pytestmark = pytest.mark.anyio
+
+
+async def _walk(client, login, course_id: int, users: int):
+    for index in range(users):
+        client.cookies.clear()
+        await login(f"walker{course_id}x{index}")
+        assert (await client.post(f"/course/start/{course_id}")).status_code == 200
+        for _ in range(index):
+            await client.get(f"/course/{course_id}/next")
+
+
+async def test_reconcile_fixes_drift(client, db, login, make_course):
+    course = await make_course(steps=3)
+    await _walk(client, login, course.id, users=4)
+    expected = await get_course_stats(db, course.id)
+    assert expected["enrolled"] == 4 and expected["completed"] == 2
+
+    # правки в обход API
+    await db.execute(update(StepStat).values(users=StepStat.users + 5))
+    await db.execute(update(CourseStat).values(enrolled=0, completed=7))
+    await db.commit()
+
+    async with session_maker() as session:
+        assert await reconcile_course_stats(session)
+    assert await get_course_stats(db, expected["course_id"]) == expected
+
+
+async def test_reconcile_does_not_lock_tables(client, db, login, make_course):
+    busy_id = (await make_course(title="Busy", steps=3)).id
+    drifted_id = (await make_course(title="Drifted", steps=3)).id
+    await _walk(client, login, busy_id, users=2)
+    await _walk(client, login, drifted_id, users=2)
+    await db.execute(update(CourseStat).where(CourseStat.course_id == drifted_id).values(enrolled=9))
+    await db.commit()
+
+    # обработчик в другом курсе держит строки счётчиков
+    async with session_maker() as handler:
+        await handler.execute(select(StepStat).where(StepStat.course_id == busy_id).with_for_update())
+        await handler.execute(select(CourseStat).where(CourseStat.course_id == busy_id).with_for_update())
+        async with session_maker() as session:
+            await session.execute(text("SET LOCAL lock_timeout = '2s'"))
+            assert await asyncio.wait_for(reconcile_course_stats(session), timeout=5)
+        await handler.rollback()
+
+    assert (await get_course_stats(db, drifted_id))["enrolled"] == 2
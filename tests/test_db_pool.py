@@ -0,0 +1,46 @@
+"""Счётчики TimedQueuePool: ожидание в очереди отдельно от открытия соединений."""
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.backend.db import TimedQueuePool
+from app.config import DB_URL
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def pool_engine(migrated_database):
+    engine = create_async_engine(DB_URL, poolclass=TimedQueuePool, pool_size=1, max_overflow=0)
+    yield engine
+    await engine.dispose()
+
+
+async def test_connect_time_is_not_wait_time(pool_engine):
+    pool = pool_engine.sync_engine.pool
+    async with pool_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    assert pool.checkouts == 1
+    assert pool.connects == 1
+    assert pool.connect_seconds > 0
+    # пул был пуст, соединение открыли сразу - в очереди не ждали
+    assert pool.checkout_wait_seconds < pool.connect_seconds
+
+
+async def test_wait_for_busy_connection(pool_engine):
+    pool = pool_engine.sync_engine.pool
+
+    async def hold():
+        async with pool_engine.connect() as connection:
+            await connection.execute(text("SELECT pg_sleep(0.3)"))
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0.1)
+    async with pool_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    await holder
+    assert pool.checkouts == 2
+    assert pool.connects == 1
+    assert pool.max_checkout_wait_seconds >= 0.1
@@ -0,0 +1,64 @@
+"""Кэш HTTP ответов: условные запросы и заголовки."""
+import pytest
+
+from app.backend.cache import cache
+from app.utils.pagination import DEFAULT_PAGE_SIZE
+from app.utils.sql_profiler import count_queries
+
+pytestmark = pytest.mark.anyio
+
+
+def _vary(response) -> list[str]:
+    return [item.strip().lower() for item in response.headers.get("vary", "").split(",")]
+
+
+async def test_not_modified_without_body_in_cache(client, make_course):
+    course = await make_course()
+    url = f"/steps/{course.id}?outline=true"
+    response = await client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    # тело вытеснено, ETag остался: 304 отдаётся без запроса в базу
+    body_key = cache.key("http", "steps", course.id, DEFAULT_PAGE_SIZE, None, True)
+    assert await cache.get_bytes(body_key) is not None
+    await cache.delete(body_key)
+    with count_queries() as log:
+        response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert log.count == 0, log.statements
+
+
+async def test_stale_etag_loads_body(client, make_course):
+    course = await make_course()
+    url = f"/steps/{course.id}?outline=true"
+    response = await client.get(url, headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.json()["course_id"] == course.id
+
+
+@pytest.mark.parametrize("accept_encoding", ["identity", "gzip"])
+async def test_same_etag_and_vary_for_200_and_304(client, make_course, accept_encoding):
+    course = await make_course(steps=30)
+    url = f"/steps/{course.id}"
+    headers = {"Accept-Encoding": accept_encoding}
+    response = await client.get(url, headers=headers)
+    assert response.status_code == 200
+    assert _vary(response).count("accept-encoding") == 1
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+    if accept_encoding == "gzip":
+        assert response.headers["content-encoding"] == "gzip"
+
+    not_modified = await client.get(url, headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert _vary(not_modified).count("accept-encoding") == 1
+
+
+async def test_middleware_compression_keeps_single_vary(client, make_course):
+    for index in range(30):
+        await make_course(title=f"Course {index}")
+    response = await client.get("/course/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert _vary(response).count("accept-encoding") == 1
@@ -0,0 +1,67 @@
+"""Планы запросов навигации и прогресса: нужные индексы действительно используются."""
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func, insert, select, text
+
+from app.models import User, UserCourseProgress
+from app.utils import read_models
+from app.utils.course_outline import outline_statement
+from app.utils.navigation import _move_statement
+
+pytestmark = pytest.mark.anyio
+
+
+def _index_names(plan: dict) -> set[str]:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", ()):
+        names |= _index_names(child)
+    return names
+
+
+async def _explain(session, statement) -> set[str]:
+    connection = await session.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    params = [compiled.params[name] for name in compiled.positiontup]
+    # на маленькой таблице планировщику дешевле seq scan; без него видно,
+    # каким индексом запрос может воспользоваться
+    await session.execute(text("SET LOCAL enable_seqscan = off"))
+    raw = await connection.get_raw_connection()
+    plan = await raw.driver_connection.fetchval(f"EXPLAIN (FORMAT JSON) {compiled.string}", *params)
+    return _index_names(plan[0]["Plan"])
+
+
+@pytest.fixture
+async def course(db, make_course):
+    course = await make_course(steps=50)
+    await make_course(title="Other", steps=50)
+    users = [{"first_name": "a", "last_name": "b", "username": f"u{i}", "hashed_password": "x"} for i in range(20)]
+    await db.execute(insert(User), users)
+    await db.execute(insert(UserCourseProgress), [
+        {"user_id": user_id, "course_id": course.id, "current_step_id": user_id} for user_id in range(1, 21)
+    ])
+    await db.commit()
+    await db.execute(text("ANALYZE"))
+    return course
+
+
+async def test_outline_uses_course_order_index(db, course):
+    assert "uq_steps_course_id_order" in await _explain(db, outline_statement(course.id))
+
+
+async def test_step_listing_uses_course_order_index(db, course):
+    query = select(*read_models.STEP_LIST_COLUMNS).where(
+        read_models.Step.course_id == course.id
+    ).order_by(read_models.Step.order).limit(51)
+    assert "uq_steps_course_id_order" in await _explain(db, query)
+
+
+async def test_move_updates_by_primary_keys(db, course):
+    progress = SimpleNamespace(current_step_id=1, is_completed=False)
+    indexes = await _explain(db, _move_statement(1, course.id, progress, 2, forward=True))
+    assert {"usercourseprogresss_pkey", "steps_pkey"} <= indexes
+
+
+async def test_course_progress_uses_course_index(db, course):
+    query = select(func.count()).select_from(UserCourseProgress).where(UserCourseProgress.course_id == course.id)
+    assert "ix_usercourseprogresss_course_id" in await _explain(db, query)
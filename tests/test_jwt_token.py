@@ -0,0 +1,62 @@
+"""Кэш проверенных JWT в decode_token."""
+import hashlib
+import time
+from datetime import timedelta
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.utils.jwt_token import decode_token, jwt_encode_token, verified_tokens
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    verified_tokens.clear()
+    yield
+    verified_tokens.clear()
+
+
+def cache_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def test_verified_token_served_from_cache(monkeypatch):
+    token = jwt_encode_token({"sub": "1", "type": "access_token"})
+    payload, token_type = decode_token(token)
+    assert token_type == "access_token"
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("signature checked again")
+
+    # попадание в кэш не проверяет подпись повторно
+    monkeypatch.setattr(jwt, "decode", fail_decode)
+    hits = verified_tokens.hits
+    assert decode_token(token) == (payload, "access_token")
+    assert verified_tokens.hits == hits + 1
+
+
+def test_cache_ttl_capped_at_exp():
+    token = jwt_encode_token({"sub": "1"}, expires_delta=timedelta(seconds=5))
+    decode_token(token)
+    expires_at, _ = verified_tokens._data[cache_key(token)]
+    assert expires_at - time.monotonic() <= 5
+    assert verified_tokens.ttl > 5
+
+
+def test_expired_token_not_cached():
+    token = jwt_encode_token({"sub": "1"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(HTTPException) as error:
+        decode_token(token)
+    assert error.value.detail == "Token has expired"
+    assert len(verified_tokens) == 0
+
+
+def test_token_not_served_from_cache_after_exp():
+    token = jwt_encode_token({"sub": "1"}, expires_delta=timedelta(seconds=1))
+    decode_token(token)
+    assert verified_tokens.get(cache_key(token)) is not None
+    time.sleep(2)
+    with pytest.raises(HTTPException) as error:
+        decode_token(token)
+    assert error.value.detail == "Token has expired"
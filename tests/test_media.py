@@ -0,0 +1,153 @@
+"""Загрузка и раздача медиа."""
+import hashlib
+import io
+
+import pytest
+
+from app.backend.media import media_storage
+from app.config import media_settings
+
+pytestmark = pytest.mark.anyio
+
+VIDEO = b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 4096
+
+
+async def _upload(client, body: bytes, content_type: str, **params):
+    return await client.post("/admin/media", content=body, params=params, headers={"Content-Type": content_type})
+
+
+async def test_range_download(client, login, media_root):
+    await login("admin", admin=True)
+    digest = (await _upload(client, VIDEO, "video/mp4")).json()["sha256"]
+    response = await client.get(f"/media/{digest}", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.content == VIDEO[:10]
+
+
+@pytest.mark.parametrize("mode, header", [("x-accel-redirect", "x-accel-redirect"), ("x-sendfile", "x-sendfile")])
+async def test_offload_to_front_server(client, login, media_root, monkeypatch, mode, header):
+    await login("admin", admin=True)
+    digest = (await _upload(client, VIDEO, "video/mp4")).json()["sha256"]
+    monkeypatch.setattr(media_settings, "MEDIA_OFFLOAD", mode)
+
+    response = await client.get(f"/media/{digest}")
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["content-type"] == "video/mp4"
+    path = media_storage.path(digest)
+    if mode == "x-sendfile":
+        assert response.headers[header] == str(path.resolve())
+    else:
+        assert response.headers[header] == "/internal-media/" + path.relative_to(media_root).as_posix()
+
+
+async def test_svg_upload_rejected(client, login, media_root):
+    await login("admin", admin=True)
+    svg = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+    response = await _upload(client, svg, "image/svg+xml")
+    assert response.status_code == 415
+    assert not media_storage.path(hashlib.sha256(svg).hexdigest()).exists()
+
+
+async def test_legacy_svg_served_as_attachment(client, db, login, media_root):
+    from app.models import MediaAsset
+
+    svg = b'<svg xmlns="http://www.w3.org/2000/svg"></svg>'
+    digest = hashlib.sha256(svg).hexdigest()
+    path = media_storage.path(digest)
+    path.parent.mkdir(parents=True)
+    path.write_bytes(svg)
+    db.add(MediaAsset(sha256=digest, content_type="image/svg+xml", size=len(svg)))
+    await db.commit()
+
+    response = await client.get(f"/media/{digest}")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["content-security-policy"] == "sandbox"
+
+
+async def test_media_security_headers(client, login, media_root):
+    await login("admin", admin=True)
+    digest = (await _upload(client, VIDEO, "video/mp4")).json()["sha256"]
+    response = await client.get(f"/media/{digest}")
+    assert response.headers["content-disposition"] == "inline"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert response.headers["content-security-policy"] == "sandbox"
+
+
+async def test_unknown_step_leaves_no_file(client, login, media_root):
+    await login("admin", admin=True)
+    response = await _upload(client, VIDEO, "video/mp4", step_id=999)
+    assert response.status_code == 404
+    assert not media_storage.path(hashlib.sha256(VIDEO).hexdigest()).exists()
+
+
+async def test_empty_upload_leaves_no_file(client, login, media_root):
+    await login("admin", admin=True)
+    response = await _upload(client, b"", "video/mp4")
+    assert response.status_code == 400
+    assert not media_storage.path(hashlib.sha256(b"").hexdigest()).exists()
+    assert not any((media_root / "tmp").iterdir())
+
+
+async def test_cleanup_keeps_file_of_concurrent_upload(client, login, media_root, monkeypatch):
+    import asyncio
+
+    from app.backend.db import session_maker
+    from app.models import MediaAsset
+    from app.routers import admin_media
+
+    await login("admin", admin=True)
+    digest = hashlib.sha256(VIDEO).hexdigest()
+    drop_orphan = admin_media._drop_orphan
+    holding = asyncio.Event()
+
+    async def concurrent_upload():
+        # вторая загрузка того же файла: видит готовый файл и пишет запись о нём
+        async with session_maker() as session:
+            await admin_media._lock_digest(session, digest)
+
+            async def chunks():
+                yield VIDEO
+
+            _, _, tmp_path = await media_storage.stage(chunks())
+            assert await media_storage.commit(tmp_path, digest) is False
+            session.add(MediaAsset(sha256=digest, content_type="video/mp4", size=len(VIDEO)))
+            await session.flush()
+            holding.set()
+            await asyncio.sleep(0.2)
+            await session.commit()
+
+    async def racing_drop_orphan(session, digest):
+        # первая загрузка упала после rename и чистит файл, пока вторая ещё не закоммитила
+        other = asyncio.create_task(concurrent_upload())
+        await holding.wait()
+        await drop_orphan(session, digest)
+        await other
+
+    monkeypatch.setattr(admin_media, "_drop_orphan", racing_drop_orphan)
+    response = await _upload(client, VIDEO, "video/mp4", step_id=999)
+    assert response.status_code == 404
+    assert media_storage.path(digest).exists()
+    assert (await client.get(f"/media/{digest}")).status_code == 200
+
+
+async def test_missing_thumbnail_is_regenerated(client, login, media_root):
+    from app.backend.media import thumbnailer
+
+    image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    image.new("RGB", (640, 480), "red").save(buffer, "PNG")
+    await login("admin", admin=True)
+
+    digest = (await _upload(client, buffer.getvalue(), "image/png")).json()["sha256"]
+    await thumbnailer.close()
+    thumbnail = media_storage.thumbnail_path(digest)
+    assert thumbnail.is_file()
+
+    thumbnail.unlink()
+    response = await _upload(client, buffer.getvalue(), "image/png")
+    assert response.json()["created"] is False
+    await thumbnailer.close()
+    assert thumbnail.is_file()
@@ -0,0 +1,18 @@
+"""Метрики: доступ к /metrics и метка маршрута."""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_metrics_require_admin(client, login):
+    assert (await client.get("/metrics")).status_code == 401
+    await login("student")
+    assert (await client.get("/metrics")).status_code == 403
+
+
+async def test_route_label_includes_router_prefixes(client, login):
+    await login("admin", admin=True)
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert 'route="/users/cookie_auth/login"' in response.text
+    assert 'route="/cookie_auth/login"' not in response.text
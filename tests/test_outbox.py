@@ -0,0 +1,118 @@
+"""Диспетчер outbox: захват пачки, доставка, повторы с задержкой."""
+import pytest
+from sqlalchemy import func, select, update
+
+from app.backend.db import session_maker
+from app.backend.outbox import MemorySink, OutboxDispatcher, OutboxSink, add_event
+from app.config import outbox_settings
+from app.models import OutboxEvent
+
+pytestmark = pytest.mark.anyio
+
+
+class FailingSink(OutboxSink):
+    async def send(self, events: list[dict]):
+        raise ConnectionError("webhook is down")
+
+
+def dispatcher(*sinks: OutboxSink, batch_size: int = 10) -> OutboxDispatcher:
+    return OutboxDispatcher(list(sinks), batch_size=batch_size, poll_interval=1, lease_seconds=60)
+
+
+async def add_events(db, count: int):
+    for index in range(count):
+        add_event(db, "test", index=index)
+    await db.commit()
+
+
+async def seconds_until_available(db) -> list[float]:
+    db.expire_all()
+    delays = await db.scalars(
+        select(func.extract("epoch", OutboxEvent.available_at - func.now())).order_by(OutboxEvent.id)
+    )
+    return [float(delay) for delay in delays]
+
+
+async def test_delivers_batches_in_order(db):
+    await add_events(db, 3)
+    sink = MemorySink()
+    worker = dispatcher(sink, batch_size=2)
+
+    assert await worker.drain_once() == 2
+    assert await worker.drain_once() == 1
+    assert await worker.drain_once() == 0
+    events = [sink.queue.get_nowait() for _ in range(3)]
+    assert [item["payload"]["index"] for item in events] == [0, 1, 2]
+    assert all(item["type"] == "test" for item in events)
+    assert await db.scalar(select(func.count()).select_from(OutboxEvent)) == 0
+    assert worker.stats() == {"delivered": 3, "failed_batches": 0}
+
+
+async def test_claim_is_committed_before_delivery(db):
+    await add_events(db, 2)
+    other = dispatcher(MemorySink())
+    seen = {}
+
+    class CheckingSink(OutboxSink):
+        async def send(self, events: list[dict]):
+            ids = [item["id"] for item in events]
+            async with session_maker() as session:
+                # строки не заблокированы на время отправки
+                locked = await session.scalars(
+                    select(OutboxEvent.id).where(OutboxEvent.id.in_(ids)).with_for_update(nowait=True)
+                )
+                seen["ids"] = locked.all()
+                await session.rollback()
+            # но другой воркер их не заберёт, пока действует аренда
+            seen["other"] = await other.drain_once()
+
+    assert await dispatcher(CheckingSink()).drain_once() == 2
+    assert len(seen["ids"]) == 2
+    assert seen["other"] == 0
+
+
+async def test_failed_delivery_is_retried_with_backoff(db):
+    await add_events(db, 2)
+    sink = MemorySink()
+    worker = dispatcher(FailingSink())
+
+    assert await worker.drain_once() == 0
+    assert worker.stats()["failed_batches"] == 1
+    rows = (await db.scalars(select(OutboxEvent).order_by(OutboxEvent.id))).all()
+    assert [row.attempts for row in rows] == [1, 1]
+    assert "webhook is down" in rows[0].last_error
+    base = outbox_settings.OUTBOX_RETRY_BASE_SECONDS
+    assert all(0 < delay <= base for delay in await seconds_until_available(db))
+    # до истечения задержки событие не берётся
+    assert await dispatcher(sink).drain_once() == 0
+
+    # вторая ошибка - задержка удваивается
+    await db.execute(update(OutboxEvent).values(available_at=func.now()))
+    await db.commit()
+    assert await worker.drain_once() == 0
+    assert all(base < delay <= 2 * base for delay in await seconds_until_available(db))
+
+    await db.execute(update(OutboxEvent).values(available_at=func.now()))
+    await db.commit()
+    assert await dispatcher(sink).drain_once() == 2
+    assert sink.queue.qsize() == 2
+
+
+async def test_expired_lease_is_claimed_again(db):
+    await add_events(db, 1)
+
+    class CrashingSink(OutboxSink):
+        async def send(self, events: list[dict]):
+            # воркер упал посреди отправки: ни удаления, ни отметки об ошибке
+            raise SystemExit
+
+    with pytest.raises(SystemExit):
+        await dispatcher(CrashingSink()).drain_once()
+    assert await dispatcher(MemorySink()).drain_once() == 0
+
+    # срок аренды истёк
+    await db.execute(update(OutboxEvent).values(available_at=func.now()))
+    await db.commit()
+    sink = MemorySink()
+    assert await dispatcher(sink).drain_once() == 1
+    assert sink.queue.get_nowait()["payload"] == {"index": 0}
@@ -0,0 +1,81 @@
+"""Keyset-пагинация списков: курсоры, ошибки в курсоре, порядок."""
+import pytest
+
+from app.models import Step, User
+from app.utils.pagination import encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+MALFORMED_CURSORS = [
+    "not base64!",
+    encode_cursor("1"),
+    encode_cursor(1, 2),
+    encode_cursor(1.5),
+    "bnVsbA",  # null
+]
+
+
+async def collect_pages(client, url: str, items: str, limit: int = 2) -> list[dict]:
+    """Проходит все страницы по next_cursor и склеивает элементы."""
+    collected, after = [], None
+    while True:
+        params = {"limit": limit}
+        if after:
+            params["after"] = after
+        response = await client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert len(body[items]) <= limit
+        collected.extend(body[items])
+        after = body["next_cursor"]
+        if after is None:
+            return collected
+
+
+async def test_courses_round_trip(client, make_course):
+    for index in range(5):
+        await make_course(title=f"Course {index}", steps=1)
+    courses = await collect_pages(client, "/course/", "courses")
+    assert [course["title"] for course in courses] == [f"Course {index}" for index in range(5)]
+    assert courses == (await client.get("/course/", params={"limit": 10})).json()["courses"]
+
+
+async def test_steps_round_trip_with_same_orders_in_other_course(client, db, make_course):
+    course = await make_course(title="First", steps=5)
+    # у другого курса те же значения order: они не попадают в страницы и не сбивают курсор
+    await make_course(title="Second", steps=5)
+    steps = await collect_pages(client, f"/steps/{course.id}", "steps")
+    assert [step["title"] for step in steps] == [f"First-{order}" for order in range(1, 6)]
+
+
+async def test_steps_order_is_unique_in_course(db, make_course):
+    from sqlalchemy.exc import IntegrityError
+
+    course = await make_course(steps=1)
+    db.add(Step(title="Tie", order=1, course_id=course.id))
+    # ключ курсора шагов - order, уникальный внутри курса, поэтому порядок страниц однозначен
+    with pytest.raises(IntegrityError):
+        await db.commit()
+    await db.rollback()
+
+
+async def test_admin_users_round_trip(client, db, login):
+    await login("admin", admin=True)
+    for index in range(4):
+        db.add(User(first_name="User", last_name=str(index), username=f"user{index}", hashed_password="-"))
+    db.add(User(first_name="User", last_name="off", username="inactive", hashed_password="-", is_active=False))
+    await db.commit()
+    users = await collect_pages(client, "/admin/all", "users")
+    assert [user["username"] for user in users] == ["admin", "user0", "user1", "user2", "user3"]
+    ids = [user["id"] for user in users]
+    assert ids == sorted(set(ids))
+
+
+@pytest.mark.parametrize("cursor", MALFORMED_CURSORS)
+async def test_malformed_cursor(client, db, login, make_course, cursor):
+    course = await make_course()
+    await login("admin", admin=True)
+    for url in ("/course/", f"/steps/{course.id}", "/admin/all"):
+        response = await client.get(url, params={"after": cursor})
+        assert response.status_code == 400, url
+        assert response.json()["detail"] == "Invalid cursor"
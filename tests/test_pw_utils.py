@@ -0,0 +1,54 @@
+"""Пул хэширования паролей: очередь, отказ 503 и учёт в stats."""
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pw_utils import PasswordHasher, hash_pw
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    yield hasher
+    hasher.shutdown()
+
+
+async def wait_for(condition):
+    while not condition():
+        await asyncio.sleep(0.01)
+
+
+async def test_rejects_when_queue_is_full(hasher):
+    release = threading.Event()
+    busy = asyncio.create_task(hasher._run("hash", release.wait))
+    await wait_for(lambda: hasher.in_progress == 1)
+    waiting = asyncio.create_task(hasher._run("hash", release.wait))
+    await wait_for(lambda: hasher.queued == 1)
+
+    with pytest.raises(HTTPException) as error:
+        await hasher.hash("password")
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "1"}
+    assert hasher.stats()["rejected"] == 1
+
+    release.set()
+    await asyncio.gather(busy, waiting)
+    stats = hasher.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["in_progress"] == 0
+    assert stats["hash_count"] == 2
+
+
+async def test_stats_recover_after_failed_hash(hasher):
+    # испорченный хэш в базе: bcrypt бросает ValueError
+    with pytest.raises(ValueError):
+        await hasher.check("password", "not-a-bcrypt-hash")
+    stats = hasher.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["in_progress"] == 0
+    # воркер освободился, следующая проверка проходит
+    assert await hasher.check("password", hash_pw("password", rounds=4))
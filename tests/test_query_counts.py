@@ -0,0 +1,119 @@
+"""Точное число SQL запросов на маршрут: N+1 и лишние запросы ломают тесты.
+
+Счёт идёт от пустых кэшей: каждый тест начинает с чистой базы и кэшей
+процесса, поэтому первый запрос - промах, повторный - попадание.
+"""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def student(client, login):
+    await login("student")
+
+
+async def test_catalog(client, make_course, assert_queries):
+    for index in range(5):
+        await make_course(title=f"Course {index}")
+    with assert_queries(1):
+        assert (await client.get("/course/")).status_code == 200
+    with assert_queries(0):
+        assert (await client.get("/course/")).status_code == 200
+
+
+async def test_course(client, make_course, assert_queries):
+    course_id = (await make_course()).id
+    with assert_queries(1):
+        assert (await client.get(f"/course/{course_id}")).status_code == 200
+    with assert_queries(0):
+        assert (await client.get(f"/course/{course_id}")).status_code == 200
+
+
+@pytest.mark.parametrize("outline", [False, True])
+async def test_steps_listing(client, make_course, assert_queries, outline):
+    course_id = (await make_course(steps=30)).id
+    url = f"/steps/{course_id}?outline={str(outline).lower()}"
+    with assert_queries(1):
+        response = await client.get(url)
+    assert len(response.json()["steps"]) == 30
+    with assert_queries(0):
+        assert (await client.get(url)).status_code == 200
+
+
+async def test_step(client, make_course, assert_queries):
+    course_id = (await make_course()).id
+    step_id = (await client.get(f"/steps/{course_id}?outline=true")).json()["steps"][0]["id"]
+    with assert_queries(1):
+        assert (await client.get(f"/steps/{course_id}/{step_id}")).status_code == 200
+    with assert_queries(0):
+        assert (await client.get(f"/steps/{course_id}/{step_id}")).status_code == 200
+
+
+async def test_login(client, login, assert_queries):
+    await login("student")
+    with assert_queries(1):
+        response = await client.post(
+            "/users/cookie_auth/login", data={"username": "student", "password": "test-password"}
+        )
+    assert response.status_code == 201
+
+
+async def test_start_course(client, student, make_course, assert_queries):
+    course_id = (await make_course()).id
+    # пользователь, оглавление, прогресс, первый шаг; событие outbox, прогресс и два счётчика
+    with assert_queries(8):
+        assert (await client.post(f"/course/start/{course_id}")).status_code == 200
+    with assert_queries(1):
+        response = await client.post(f"/course/start/{course_id}")
+    assert response.json()["message"] == "User has already started the course"
+
+
+async def test_navigation(client, student, make_course, assert_queries):
+    course_id = (await make_course(steps=5)).id
+    await client.post(f"/course/start/{course_id}")
+    # прогресс, сравнение-и-обмен шага и дельта счётчиков шагов
+    for _ in range(3):
+        with assert_queries(3):
+            assert (await client.get(f"/course/{course_id}/next")).status_code == 200
+    with assert_queries(3):
+        assert (await client.get(f"/course/{course_id}/back")).status_code == 200
+    with assert_queries(1):
+        assert (await client.get(f"/course/progress/{course_id}")).status_code == 200
+
+
+async def test_reset(client, student, make_course, assert_queries):
+    course_id = (await make_course()).id
+    await client.post(f"/course/start/{course_id}")
+    with assert_queries(5):
+        assert (await client.delete(f"/course/reset/{course_id}")).status_code == 200
+
+
+async def test_my_courses_does_not_grow_with_courses(client, student, make_course, assert_queries):
+    for index in range(5):
+        course_id = (await make_course(title=f"Course {index}")).id
+        await client.post(f"/course/start/{course_id}")
+    with assert_queries(1):
+        response = await client.get("/users/my_courses")
+    assert response.status_code == 200
+    with assert_queries(0):
+        assert (await client.get("/users/cookie_auth/me")).status_code == 200
+
+
+@pytest.mark.parametrize("user_cached", [True, False])
+async def test_navigation_checks_out_one_connection(client, db, student, make_course, user_cached):
+    from sqlalchemy import select
+
+    from app.backend.db import pool_stats
+    from app.models import User
+    from app.utils.current_user import invalidate_user
+
+    course_id = (await make_course(steps=5)).id
+    await client.post(f"/course/start/{course_id}")
+    if not user_cached:
+        await invalidate_user(await db.scalar(select(User.id).where(User.username == "student")))
+    await db.close()
+    # авторизация и обработчик работают в одной сессии - одно соединение на запрос
+    checkouts = pool_stats()["checkouts"]
+    assert (await client.get(f"/course/{course_id}/next")).status_code == 200
+    assert pool_stats()["checkouts"] == checkouts + 1
@@ -0,0 +1,58 @@
+"""Deny-list отозванных токенов не зависит от вытеснения в кэше."""
+import time
+
+import pytest
+from sqlalchemy import select
+
+from app.backend.cache import cache
+from app.config import cache_settings
+from app.models import RevokedToken
+from app.utils.jwt_token import revoked_tokens
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_logout_survives_cache_eviction(client, db, login):
+    await login("revoked")
+    token = client.cookies["access_token"]
+    response = await client.get("/users/cookie_auth/logout")
+    assert response.status_code == 200, response.text
+    assert (await db.scalars(select(RevokedToken.jti))).all()
+
+    # вытесняем из общего кэша всё, что в нём было
+    for index in range(cache_settings.CACHE_MEMORY_MAX_SIZE + 1):
+        await cache.set(cache.key("filler", index), index, ttl=60)
+    # другой воркер: копии deny-list в памяти нет, она читается из таблицы
+    revoked_tokens.clear()
+    await revoked_tokens.sync()
+
+    client.cookies.set("access_token", token)
+    response = await client.get("/users/cookie_auth/me")
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+
+
+async def test_sync_keeps_concurrent_revocations(db, monkeypatch):
+    from app.backend import db as backend_db
+    from app.utils import jwt_token
+
+    now = time.time()
+    revoked_tokens.add("expired", now - 1)
+    real_session_maker = backend_db.session_maker
+
+    class RevokeDuringSync:
+        # отзыв в этом воркере приходит, пока sync ждёт ответа базы
+        def __init__(self):
+            self.session = real_session_maker()
+
+        async def __aenter__(self):
+            revoked_tokens.add("concurrent", now + 60)
+            return await self.session.__aenter__()
+
+        async def __aexit__(self, *exc):
+            return await self.session.__aexit__(*exc)
+
+    monkeypatch.setattr(jwt_token, "session_maker", RevokeDuringSync)
+    await revoked_tokens.sync()
+    assert "concurrent" in revoked_tokens
+    assert revoked_tokens.stats()["size"] == 1